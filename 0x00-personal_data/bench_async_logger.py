@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Throughput of the redacting logger, synchronous vs queue-backed.
+
+Application threads log bursts of records to a file through each
+pipeline, sleeping between bursts as request handlers waiting on I/O
+would. The caller rate counts only the time spent in logger.info, the
+end-to-end rate includes the sleeps and draining the queue.
+
+Usage: ./bench_async_logger.py [threads] [records_per_thread] [burst]
+"""
+import logging
+import sys
+import tempfile
+import threading
+import time
+from filtered_logger import AsyncQueueHandler, PII_FIELDS, RedactingFormatter
+
+MESSAGE = ("name=Bob Dylan;email=bob@dylan.com;phone=(773) 720-1234;"
+           "ssn=487-56-1234;password=wJalrXUtnFEMI;ip=192.168.0.1;"
+           "last_login=2019-11-14T06:16:24;user_agent=Mozilla/5.0;")
+
+
+def make_logger(label: str, stream, mode: str) -> tuple:
+    """
+    Returns (logger, handler) writing redacted records to stream.
+    """
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(RedactingFormatter(PII_FIELDS))
+    if mode == "async block":
+        handler = AsyncQueueHandler([handler], 10000, "block")
+    elif mode == "async drop":
+        handler = AsyncQueueHandler([handler], 1000, "drop")
+    logger = logging.Logger(label, logging.INFO)
+    logger.addHandler(handler)
+    return logger, handler
+
+
+def run(mode: str, threads: int, records: int, burst: int):
+    """
+    Logs records from each thread and prints the rates.
+    """
+    with tempfile.TemporaryFile('w+') as stream:
+        logger, handler = make_logger(mode, stream, mode)
+        spent = []
+
+        def work():
+            """ Logs bursts of records, timing the calls """
+            logging_time = 0
+            for _ in range(records // burst):
+                start = time.perf_counter()
+                for i in range(burst):
+                    logger.info(MESSAGE)
+                logging_time += time.perf_counter() - start
+                time.sleep(0.005)
+            spent.append(logging_time)
+
+        workers = [threading.Thread(target=work) for _ in range(threads)]
+        start = time.perf_counter()
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+        handler.close()
+        elapsed = time.perf_counter() - start
+        stream.seek(0)
+        written = sum(1 for _ in stream)
+    total = threads * (records // burst) * burst
+    print("{:<12} caller {:>10,.0f} records/sec   end-to-end {:>9,.0f} "
+          "records/sec   written {:,}/{:,}".format(
+              mode, total / (sum(spent) / threads), total / elapsed,
+              written, total))
+
+
+def main():
+    """
+    Compares the pipelines.
+    """
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    records = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+    burst = int(sys.argv[3]) if len(sys.argv) > 3 else 50
+    print("{} threads x {:,} records, in bursts of {}".format(
+        threads, records, burst))
+    for mode in ("sync", "async block", "async drop"):
+        run(mode, threads, records, burst)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Batch bcrypt throughput of encrypt_password across worker counts.
+
+Hashes then verifies the same passwords with 1, 2, 4, ... workers up to
+the CPU count and prints hashes/sec and the speedup over one worker.
+bcrypt is pure CPU work, so the speedup cannot exceed the number of
+cores the machine actually has.
+
+Usage: ./bench_encrypt_password.py [passwords] [rounds] [max_workers]
+"""
+import os
+import sys
+import time
+from encrypt_password import are_valid, hash_passwords
+
+
+def worker_counts(max_workers: int) -> list:
+    """
+    Returns 1, 2, 4, ... up to and including max_workers.
+    """
+    counts = [1]
+    while counts[-1] * 2 < max_workers:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != max_workers:
+        counts.append(max_workers)
+    return counts
+
+
+def main():
+    """
+    Times the batch functions for each worker count.
+    """
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    max_workers = int(sys.argv[3]) if len(sys.argv) > 3 else os.cpu_count()
+    passwords = ["password-{}".format(i) for i in range(count)]
+    print("{} passwords, {} rounds, {} CPUs".format(
+        count, rounds, os.cpu_count()))
+    base = None
+    for workers in worker_counts(max_workers):
+        start = time.perf_counter()
+        hashes = hash_passwords(passwords, rounds, workers)
+        hashed = time.perf_counter() - start
+        start = time.perf_counter()
+        valid = are_valid(zip(hashes, passwords), workers)
+        checked = time.perf_counter() - start
+        assert all(valid)
+        rate = count / hashed
+        base = base or rate
+        print("{:>3} workers   hash {:>8,.1f}/sec   verify {:>8,.1f}/sec"
+              "   speedup {:.2f}x".format(
+                  workers, rate, count / checked, rate / base))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,20 +2,118 @@
 """
 A module for encrypting passwords.
 """
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Callable, Iterable, List, Tuple
 import bcrypt
 
+# Cost factor bcrypt.gensalt uses by default
+DEFAULT_ROUNDS = 12
+# Cost factors bcrypt accepts
+MIN_ROUNDS, MAX_ROUNDS = 4, 31
 
-def hash_password(password: str) -> bytes:
+_rounds = None
+_rounds_lock = threading.Lock()
+
+
+def calibrate_rounds(target_ms: float, min_rounds: int = MIN_ROUNDS,
+                     max_rounds: int = 16) -> int:
+    """
+    Finds the highest cost factor hashing within target_ms on this
+    machine. Each extra round doubles the work, so the search times one
+    hash per cost and stops once the next one would exceed the target.
+
+    Args:
+        target_ms (float): Time budget of one hash, in milliseconds.
+        min_rounds (int): Lowest cost factor returned.
+        max_rounds (int): Highest cost factor tried.
+
+    Returns:
+        int: The calibrated cost factor.
+    """
+    rounds = max(min_rounds, MIN_ROUNDS)
+    while rounds < min(max_rounds, MAX_ROUNDS):
+        salt = bcrypt.gensalt(rounds)
+        start = time.perf_counter()
+        bcrypt.hashpw(b"calibration", salt)
+        if (time.perf_counter() - start) * 2000 > target_ms:
+            break
+        rounds += 1
+    return rounds
+
+
+def get_rounds() -> int:
+    """
+    Returns the cost factor for new hashes: BCRYPT_ROUNDS if set, else
+    the result of calibrate_rounds(BCRYPT_TARGET_MS) if set, computed
+    once per process, else DEFAULT_ROUNDS. Calibration runs outside the
+    lock; threads racing on the first call may each calibrate, the first
+    result is kept.
+
+    Returns:
+        int: The cost factor.
+    """
+    global _rounds
+    if _rounds is None:
+        if os.getenv("BCRYPT_ROUNDS"):
+            rounds = int(os.getenv("BCRYPT_ROUNDS"))
+        elif os.getenv("BCRYPT_TARGET_MS"):
+            rounds = calibrate_rounds(float(os.getenv("BCRYPT_TARGET_MS")))
+        else:
+            rounds = DEFAULT_ROUNDS
+        with _rounds_lock:
+            if _rounds is None:
+                _rounds = rounds
+    return _rounds
+
+
+def hash_rounds(hashed_password: bytes) -> int:
+    """
+    Reads the cost factor a hash was made with.
+
+    Args:
+        hashed_password (bytes): A bcrypt hash, e.g. b"$2b$12$...".
+
+    Returns:
+        int: The cost factor.
+    """
+    if isinstance(hashed_password, str):
+        hashed_password = hashed_password.encode('utf-8')
+    return int(hashed_password.split(b"$")[2])
+
+
+def needs_rehash(hashed_password: bytes, rounds: int = None) -> bool:
+    """
+    Checks if a hash was made with a lower cost factor than the current
+    one, meaning it should be upgraded on the next successful login.
+    Stronger hashes are kept.
+
+    Args:
+        hashed_password (bytes): The stored hash.
+        rounds (int): The wanted cost factor, defaults to get_rounds().
+
+    Returns:
+        bool: True if the hash should be recomputed.
+    """
+    return hash_rounds(hashed_password) < (rounds or get_rounds())
+
+
+def hash_password(password: str, rounds: int = None) -> bytes:
     """
     Hashes a password using a random salt.
 
     Args:
         password (str): The password to hash.
+        rounds (int): The bcrypt cost factor, defaults to get_rounds().
 
     Returns:
         bytes: The hashed password.
     """
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+    return bcrypt.hashpw(password.encode('utf-8'),
+                         bcrypt.gensalt(rounds or get_rounds()))
 
 
 def is_valid(hashed_password: bytes, password: str) -> bool:
@@ -30,3 +128,78 @@ def is_valid(hashed_password: bytes, password: str) -> bool:
         bool: True if the password matches the hash, False otherwise.
     """
     return bcrypt.checkpw(password.encode('utf-8'), hashed_password)
+
+
+def _hash_chunk(rounds: int, passwords: List[str]) -> List[bytes]:
+    """
+    Hashes a chunk of passwords, runs inside a pool worker.
+    """
+    return [hash_password(password, rounds) for password in passwords]
+
+
+def _check_chunk(pairs: List[Tuple[bytes, str]]) -> List[bool]:
+    """
+    Checks a chunk of (hashed_password, password) pairs, runs inside a
+    pool worker.
+    """
+    return [is_valid(hashed, password) for hashed, password in pairs]
+
+
+def _run_chunks(func: Callable, items: list, workers: int,
+                chunk_size: int, *args) -> list:
+    """
+    Runs func(*args, chunk) over chunks of items in a process pool and
+    returns the results flattened in input order. A single worker, or a
+    single chunk, runs in this process to skip the pool start up.
+    """
+    workers = workers or os.cpu_count() or 1
+    if not chunk_size:
+        # four chunks per worker keep workers busy until the end
+        chunk_size = max(1, -(-len(items) // (workers * 4)))
+    chunks = [items[i:i + chunk_size]
+              for i in range(0, len(items), chunk_size)]
+    if workers == 1 or len(chunks) <= 1:
+        return [result for chunk in chunks for result in func(*args, chunk)]
+    with ProcessPoolExecutor(min(workers, len(chunks))) as pool:
+        mapped = pool.map(partial(func, *args) if args else func, chunks)
+        return [result for chunk in mapped for result in chunk]
+
+
+def hash_passwords(passwords: Iterable[str], rounds: int = None,
+                   workers: int = None, chunk_size: int = None) -> List[bytes]:
+    """
+    Hashes many passwords, each with its own random salt, across a pool
+    of worker processes.
+
+    Args:
+        passwords (Iterable[str]): The passwords to hash.
+        rounds (int): The bcrypt cost factor, defaults to get_rounds().
+        workers (int): Worker processes, defaults to the CPU count.
+        chunk_size (int): Passwords sent to a worker at once, defaults to
+            a quarter of each worker's share.
+
+    Returns:
+        List[bytes]: The hashed passwords, in input order.
+    """
+    return _run_chunks(_hash_chunk, list(passwords), workers, chunk_size,
+                       rounds or get_rounds())
+
+
+def are_valid(pairs: Iterable[Tuple[bytes, str]], workers: int = None,
+              chunk_size: int = None) -> List[bool]:
+    """
+    Checks many passwords against their hashes across a pool of worker
+    processes. Each hash is checked at the cost it was made with.
+
+    Args:
+        pairs (Iterable[Tuple[bytes, str]]): (hashed_password, password)
+            pairs to verify.
+        workers (int): Worker processes, defaults to the CPU count.
+        chunk_size (int): Pairs sent to a worker at once, defaults to a
+            quarter of each worker's share.
+
+    Returns:
+        List[bool]: True for each password matching its hash, in input
+            order.
+    """
+    return _run_chunks(_check_chunk, list(pairs), workers, chunk_size)
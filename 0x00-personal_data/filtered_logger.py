@@ -4,9 +4,19 @@ Module to filter logs and handle sensitive data.
 """
 import os
 import re
+import queue
+import atexit
 import logging
-import mysql.connector
-from typing import List
+import logging.handlers
+import sqlite3
+import threading
+import functools
+from typing import Iterable, Iterator, List, Tuple
+
+try:
+    import mysql.connector
+except ImportError:
+    mysql = None
 
 # Define patterns for extracting and replacing PII in logs
 patterns = {
@@ -19,6 +29,102 @@ patterns = {
 PII_FIELDS = ("name", "email", "phone", "ssn", "password")
 
 
+class Redactor:
+    """
+    Redaction engine compiled once for a (fields, separator, redaction)
+    tuple.
+    """
+
+    def __init__(self, fields: Tuple[str, ...], redaction: str,
+                 separator: str):
+        """
+        Compiles the extraction pattern for the given fields.
+
+        Args:
+            fields (Tuple[str, ...]): Fields to redact.
+            redaction (str): The replacement text for the redacted fields.
+            separator (str): The separator used in the log message.
+        """
+        self.regex = re.compile(patterns["extract"](fields, separator))
+        self.replacement = patterns["replace"](redaction)
+        # Bound fast path: redact(message) -> str
+        self.redact = functools.partial(self.regex.sub, self.replacement)
+
+
+class TokenRedactor:
+    """
+    Redaction engine splitting the message on the separator once and
+    looking each `key=value` token up in the set of fields.
+
+    Unlike the regex, a field only matches a whole key (leading spaces
+    ignored): `username=x` is left alone when redacting `name`.
+    """
+
+    def __init__(self, fields: Tuple[str, ...], redaction: str,
+                 separator: str):
+        """
+        Stores the configuration.
+
+        Args:
+            fields (Tuple[str, ...]): Fields to redact.
+            redaction (str): The replacement text for the redacted fields.
+            separator (str): The separator used in the log message.
+        """
+        self.fields = frozenset(fields)
+        self.redaction = redaction
+        self.separator = separator
+
+    def redact(self, message: str) -> str:
+        """
+        Redacts the values of the fields in a message.
+
+        Args:
+            message (str): The original log message.
+
+        Returns:
+            str: The log message with redacted fields.
+        """
+        tokens = message.split(self.separator)
+        fields = self.fields
+        for i, token in enumerate(tokens):
+            key, equal, _ = token.partition('=')
+            if equal and key.lstrip() in fields:
+                tokens[i] = key + equal + self.redaction
+        return self.separator.join(tokens)
+
+
+REDACTORS = {'regex': Redactor, 'token': TokenRedactor}
+
+
+@functools.lru_cache(maxsize=64)
+def _cached_redactor(fields: Tuple[str, ...], redaction: str,
+                     separator: str, strategy: str) -> Redactor:
+    """
+    Returns the shared redactor of a hashable configuration.
+    """
+    return REDACTORS[strategy](fields, redaction, separator)
+
+
+def get_redactor(fields: List[str], redaction: str, separator: str,
+                 strategy: str = "regex") -> Redactor:
+    """
+    Returns the compiled redactor for the given configuration.
+
+    Args:
+        fields (List[str]): Fields to redact.
+        redaction (str): The replacement text for the redacted fields.
+        separator (str): The separator used in the log message.
+        strategy (str): "regex" (Redactor) or "token" (TokenRedactor).
+
+    Returns:
+        Redactor: A redactor shared by all callers using the same
+        configuration.
+    """
+    if strategy not in REDACTORS:
+        raise ValueError("unknown redaction strategy: {}".format(strategy))
+    return _cached_redactor(tuple(fields), redaction, separator, strategy)
+
+
 def filter_datum(fields: List[str], redaction: str, message: str,
                  separator: str) -> str:
     """
@@ -33,34 +139,201 @@ def filter_datum(fields: List[str], redaction: str, message: str,
     Returns:
         str: The log message with redacted fields.
     """
-    extract_pattern = patterns["extract"](fields, separator)
-    replace_pattern = patterns["replace"](redaction)
-    return re.sub(extract_pattern, replace_pattern, message)
+    return get_redactor(fields, redaction, separator).redact(message)
 
 
-def get_logger() -> logging.Logger:
+def get_logger(asynchronous: bool = None) -> logging.Logger:
     """
     Creates and configures a logger for user data logs.
 
+    Args:
+        asynchronous (bool, optional): Redact and write records on a
+            background thread (see AsyncQueueHandler). Defaults to
+            PERSONAL_DATA_LOG_ASYNC being "true".
+
     Returns:
         logging.Logger: Configured logger instance.
     """
+    if asynchronous is None:
+        asynchronous = os.getenv("PERSONAL_DATA_LOG_ASYNC",
+                                 "false").lower() == "true"
     logger = logging.getLogger("user_data")
     handler = logging.StreamHandler()
-    handler.setFormatter(RedactingFormatter(PII_FIELDS))
+    handler.setFormatter(RedactingFormatter(
+        PII_FIELDS, os.getenv("PERSONAL_DATA_REDACTION", "regex")))
+    if asynchronous:
+        handler = AsyncQueueHandler(
+            [handler],
+            int(os.getenv("PERSONAL_DATA_LOG_QUEUE_SIZE", 10000)),
+            os.getenv("PERSONAL_DATA_LOG_QUEUE_POLICY", "block"))
     logger.setLevel(logging.INFO)
     logger.propagate = False
     logger.addHandler(handler)
     return logger
 
 
-def get_db() -> mysql.connector.connection.MySQLConnection:
+class AsyncQueueHandler(logging.handlers.QueueHandler):
+    """
+    Handler that only puts records on a bounded queue; a
+    BatchQueueListener thread formats (redacts) and writes them.
+    """
+
+    def __init__(self, handlers: List[logging.Handler],
+                 queue_size: int = 10000, policy: str = "block",
+                 batch_size: int = 256):
+        """
+        Creates the queue and starts its listener.
+
+        Args:
+            handlers (List[logging.Handler]): Handlers writing the records.
+            queue_size (int): Maximum number of queued records.
+            policy (str): When the queue is full, "block" waits for room
+                and "drop" discards the record (counted in `dropped`).
+            batch_size (int): Maximum number of records per write.
+        """
+        if policy not in ("block", "drop"):
+            raise ValueError("policy must be 'block' or 'drop'")
+        super().__init__(queue.Queue(queue_size))
+        self.policy = policy
+        self.dropped = 0
+        self._dropped_lock = threading.Lock()
+        self.listener = BatchQueueListener(self.queue, handlers, batch_size)
+        self.listener.start()
+        atexit.register(self.close)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        Leaves the record as is: formatting happens on the listener.
+
+        Args:
+            record (logging.LogRecord): The record to queue.
+
+        Returns:
+            logging.LogRecord: The same record.
+        """
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        """
+        Queues a record, waiting or dropping it when the queue is full.
+
+        Args:
+            record (logging.LogRecord): The record to queue.
+        """
+        if self.policy == "block":
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            # many threads drop at once when the queue is full
+            with self._dropped_lock:
+                self.dropped += 1
+
+    def close(self):
+        """
+        Writes the queued records and stops the listener.
+        """
+        self.listener.stop()
+        super().close()
+
+
+class BatchQueueListener:
+    """
+    Thread draining a queue of log records in batches: each batch is
+    formatted and written to each stream handler in a single write.
+    """
+
+    _SENTINEL = None
+
+    def __init__(self, records: queue.Queue, handlers: List[logging.Handler],
+                 batch_size: int = 256):
+        """
+        Initializes the listener.
+
+        Args:
+            records (queue.Queue): Queue of log records.
+            handlers (List[logging.Handler]): Handlers writing the records.
+            batch_size (int): Maximum number of records per write.
+        """
+        self.queue = records
+        self.handlers = handlers
+        self.batch_size = batch_size
+        self._thread = None
+
+    def start(self):
+        """
+        Starts the background thread.
+        """
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Writes the queued records, then stops the thread.
+        """
+        if self._thread is None:
+            return
+        self.queue.put(self._SENTINEL)
+        self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        """
+        Waits for a record, then takes whatever else is queued.
+        """
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            if self._SENTINEL in batch:
+                self.handle(batch[:batch.index(self._SENTINEL)])
+                return
+            self.handle(batch)
+
+    def handle(self, batch: List[logging.LogRecord]):
+        """
+        Formats and writes a batch of records to each handler.
+
+        Args:
+            batch (List[logging.LogRecord]): The records.
+        """
+        for handler in self.handlers:
+            records = [r for r in batch
+                       if r.levelno >= handler.level and handler.filter(r)]
+            if not records:
+                continue
+            if not isinstance(handler, logging.StreamHandler):
+                for record in records:
+                    handler.handle(record)
+                continue
+            try:
+                text = "".join([handler.format(r) + handler.terminator
+                                for r in records])
+                with handler.lock:
+                    handler.stream.write(text)
+                    handler.flush()
+            except Exception:
+                for record in records:
+                    handler.handleError(record)
+
+
+def get_db() -> "mysql.connector.connection.MySQLConnection":
     """
     Establishes a connection to the database using environment variables.
 
+    When PERSONAL_DATA_DB_SQLITE is set, a local SQLite database at that
+    path stands in for MySQL.
+
     Returns:
         mysql.connector.connection.MySQLConnection: Database connection object.
     """
+    sqlite_path = os.getenv("PERSONAL_DATA_DB_SQLITE")
+    if sqlite_path:
+        return sqlite3.connect(sqlite_path)
     db_config = {
         'host': os.getenv("PERSONAL_DATA_DB_HOST", "localhost"),
         'database': os.getenv("PERSONAL_DATA_DB_NAME", ""),
@@ -71,24 +344,86 @@ def get_db() -> mysql.connector.connection.MySQLConnection:
     return mysql.connector.connect(**db_config)
 
 
-def main():
+def get_cursor(connection):
+    """
+    Opens a cursor that streams rows from the server instead of
+    buffering the whole result set on the client.
+
+    Args:
+        connection: A MySQL or SQLite connection.
+
+    Returns:
+        A DB-API cursor.
+    """
+    if isinstance(connection, sqlite3.Connection):
+        # SQLite cursors step through the result lazily
+        return connection.cursor()
+    return connection.cursor(buffered=False)
+
+
+def iter_rows(cursor, batch_size: int) -> Iterator[tuple]:
+    """
+    Yields the rows of an executed query, fetching batch_size at a time.
+
+    Args:
+        cursor: A cursor with a pending result set.
+        batch_size (int): Number of rows per fetchmany call.
+
+    Returns:
+        Iterator[tuple]: The result rows.
+    """
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return
+        yield from rows
+
+
+def format_rows(columns: List[str],
+                rows: Iterable[tuple]) -> Iterator[str]:
+    """
+    Turns rows into `column=value; ...` log messages.
+
+    Args:
+        columns (List[str]): Column names, in the order of the rows.
+        rows (Iterable[tuple]): The rows to format.
+
+    Returns:
+        Iterator[str]: One message per row.
+    """
+    for row in rows:
+        yield '; '.join(['{}={}'.format(col, val) for col, val in zip(
+            columns, row)])
+
+
+def main(batch_size: int = None):
     """
-    Fetches and logs user records from the database.
+    Streams user records from the database into the redacting logger.
+
+    Rows go through a generator pipeline so memory use does not grow
+    with the size of the users table.
+
+    Args:
+        batch_size (int, optional): Rows fetched per round trip.
+            Defaults to PERSONAL_DATA_BATCH_SIZE or 1000.
     """
+    if batch_size is None:
+        batch_size = int(os.getenv("PERSONAL_DATA_BATCH_SIZE", 1000))
     fields = "name,email,phone,ssn,password,ip,last_login,user_agent"
     columns = fields.split(',')
     query = "SELECT {} FROM users;".format(fields)
     logger = get_logger()
     connection = get_db()
-    with connection.cursor() as cursor:
+    cursor = get_cursor(connection)
+    try:
         cursor.execute(query)
-        rows = cursor.fetchall()
-        for row in rows:
-            record = '; '.join(['{}={}'.format(col, val) for col, val in zip(
-                columns, row)])
+        for record in format_rows(columns, iter_rows(cursor, batch_size)):
             log_record = logging.LogRecord("user_data", logging.INFO, None,
                                            None, record, None, None)
             logger.handle(log_record)
+    finally:
+        cursor.close()
+        connection.close()
 
 
 class RedactingFormatter(logging.Formatter):
@@ -100,15 +435,20 @@ class RedactingFormatter(logging.Formatter):
     FORMAT = "[HOLBERTON] %(name)s %(levelname)s %(asctime)-15s: %(message)s"
     SEPARATOR = ";"
 
-    def __init__(self, fields: List[str]):
+    def __init__(self, fields: List[str], strategy: str = "regex"):
         """
         Initializes the formatter with fields to redact.
 
         Args:
             fields (List[str]): Fields to be redacted in log messages.
+            strategy (str): "regex" redacts the whole formatted line,
+                "token" tokenizes the message only, not the prefix.
         """
         super().__init__(self.FORMAT)
         self.fields = fields
+        self.strategy = strategy
+        self._redact = get_redactor(fields, self.REDACTION,
+                                    self.SEPARATOR, strategy).redact
 
     def format(self, record: logging.LogRecord) -> str:
         """
@@ -120,8 +460,29 @@ class RedactingFormatter(logging.Formatter):
         Returns:
             str: The formatted log record with redacted information.
         """
-        msg = super().format(record)
-        return filter_datum(self.fields, self.REDACTION, msg, self.SEPARATOR)
+        if self.strategy == "token":
+            return super().format(record)
+        return self._redact(super().format(record))
+
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        """
+        Formats the record with, for the token strategy, its message
+        redacted.
+
+        Args:
+            record (logging.LogRecord): The record, message already set.
+
+        Returns:
+            str: The formatted line.
+        """
+        if self.strategy != "token":
+            return super().formatMessage(record)
+        message = record.message
+        record.message = self._redact(message)
+        try:
+            return super().formatMessage(record)
+        finally:
+            record.message = message
 
 
 if __name__ == "__main__":
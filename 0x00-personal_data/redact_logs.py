@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Command line tool redacting PII in existing log files.
+
+Input files are memory-mapped (or streamed, for pipes and stdin) and cut
+into line-aligned chunks; a process pool redacts the chunks with the
+filtered_logger regex and the output is written in input order.
+
+Usage: ./redact_logs.py [-o OUTPUT] [--fields name,email,...] INPUT...
+"""
+import argparse
+import mmap
+import os
+import re
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import BinaryIO, Iterator, List, Tuple
+from filtered_logger import PII_FIELDS, RedactingFormatter, patterns
+
+# Set in each worker by _init_worker
+_worker = {}
+
+
+def compile_redactor(fields: List[str], redaction: str,
+                     separator: str) -> Tuple[re.Pattern, bytes]:
+    """
+    Compiles the filtered_logger pattern for raw bytes.
+
+    Values also stop at line ends, so a field closing a line without a
+    separator does not swallow the next line.
+
+    Args:
+        fields (List[str]): Fields to redact.
+        redaction (str): The replacement text for the redacted fields.
+        separator (str): The separator used in the log lines.
+
+    Returns:
+        Tuple[re.Pattern, bytes]: The pattern and its replacement.
+    """
+    extract = patterns["extract"](fields, re.escape(separator) + "\n")
+    return (re.compile(extract.encode()),
+            patterns["replace"](redaction).encode())
+
+
+def line_chunks(data, size: int,
+                chunk_size: int) -> Iterator[Tuple[int, int]]:
+    """
+    Splits data into (start, end) ranges ending at a line end.
+
+    Args:
+        data: A bytes-like object supporting find, e.g. an mmap.
+        size (int): Length of data.
+        chunk_size (int): Approximate length of a chunk.
+
+    Returns:
+        Iterator[Tuple[int, int]]: The ranges, in order.
+    """
+    start = 0
+    while start < size:
+        end = data.find(b"\n", min(start + chunk_size, size) - 1)
+        end = size if end == -1 else end + 1
+        yield start, end
+        start = end
+
+
+def stream_chunks(stream: BinaryIO, chunk_size: int) -> Iterator[bytes]:
+    """
+    Reads a stream in chunks ending at a line end.
+
+    Args:
+        stream (BinaryIO): The input stream.
+        chunk_size (int): Approximate length of a chunk.
+
+    Returns:
+        Iterator[bytes]: The chunks, in order.
+    """
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            return
+        if not chunk.endswith(b"\n"):
+            chunk += stream.readline()
+        yield chunk
+
+
+def _init_worker(path: str, fields: List[str], redaction: str,
+                 separator: str):
+    """
+    Compiles the pattern and maps the input file in a worker process.
+    """
+    _worker["regex"], _worker["replacement"] = compile_redactor(
+        fields, redaction, separator)
+    _worker["map"] = None
+    if path is not None:
+        with open(path, "rb") as f:
+            _worker["map"] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _redact_range(start: int, end: int) -> bytes:
+    """
+    Redacts a range of the mapped input file.
+    """
+    return _redact_chunk(_worker["map"][start:end])
+
+
+def _redact_chunk(chunk: bytes) -> bytes:
+    """
+    Redacts a chunk of lines.
+    """
+    return _worker["regex"].sub(_worker["replacement"], chunk)
+
+
+def redact_file(path: str, output: BinaryIO, args) -> int:
+    """
+    Redacts one input file, "-" for stdin, into output.
+
+    At most two chunks per worker are in flight, so memory use does not
+    depend on the size of the input.
+
+    Args:
+        path (str): The input path.
+        output (BinaryIO): Where redacted lines are written.
+        args: The parsed command line.
+
+    Returns:
+        int: Number of input bytes.
+    """
+    mapped = path != "-" and os.path.isfile(path)
+    if mapped and os.path.getsize(path) == 0:
+        return 0
+    workers = args.workers or os.cpu_count()
+    chunk_size = args.chunk_size * 2 ** 20
+    initargs = (path if mapped else None, args.fields.split(","),
+                args.redaction, args.separator)
+    with ProcessPoolExecutor(workers, initializer=_init_worker,
+                             initargs=initargs) as pool:
+        if mapped:
+            with open(path, "rb") as f:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            with data:
+                tasks = ((_redact_range, start, end) for start, end in
+                         line_chunks(data, len(data), chunk_size))
+                return _write_in_order(pool, tasks, output, workers * 2)
+        stream = sys.stdin.buffer if path == "-" else open(path, "rb")
+        try:
+            tasks = ((_redact_chunk, chunk) for chunk in
+                     stream_chunks(stream, chunk_size))
+            return _write_in_order(pool, tasks, output, workers * 2)
+        finally:
+            if stream is not sys.stdin.buffer:
+                stream.close()
+
+
+def _write_in_order(pool: ProcessPoolExecutor, tasks: Iterator[tuple],
+                    output: BinaryIO, window: int) -> int:
+    """
+    Submits tasks keeping `window` in flight and writes their results in
+    submission order; returns the number of input bytes.
+    """
+    pending = deque()
+    size = 0
+    for task in tasks:
+        func, *task_args = task
+        size += (task_args[1] - task_args[0] if func is _redact_range
+                 else len(task_args[0]))
+        pending.append(pool.submit(func, *task_args))
+        if len(pending) >= window:
+            output.write(pending.popleft().result())
+    while pending:
+        output.write(pending.popleft().result())
+    return size
+
+
+def parse_args(argv: List[str]):
+    """
+    Parses the command line.
+    """
+    parser = argparse.ArgumentParser(
+        description="Redact PII fields in log files")
+    parser.add_argument("inputs", nargs="+", metavar="INPUT",
+                        help="log file to redact, - for stdin")
+    parser.add_argument("-o", "--output", default="-",
+                        help="output file (default: stdout)")
+    parser.add_argument("--fields", default=",".join(PII_FIELDS),
+                        help="comma separated fields to redact")
+    parser.add_argument("--separator", default=RedactingFormatter.SEPARATOR)
+    parser.add_argument("--redaction", default=RedactingFormatter.REDACTION)
+    parser.add_argument("-j", "--workers", type=int, default=0,
+                        help="worker processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=8,
+                        help="chunk size in MB (default: 8)")
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str] = None) -> int:
+    """
+    Redacts the input files into the output and reports MB/s on stderr.
+    """
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    start = time.perf_counter()
+    size = 0
+    if args.output == "-":
+        output = sys.stdout.buffer
+    else:
+        output = open(args.output, "wb")
+    try:
+        for path in args.inputs:
+            size += redact_file(path, output, args)
+    except OSError as e:
+        print("redact_logs: {}".format(e), file=sys.stderr)
+        return 1
+    finally:
+        if output is not sys.stdout.buffer:
+            output.close()
+        else:
+            output.flush()
+    elapsed = time.perf_counter() - start
+    print("{:,.1f} MB redacted in {:.2f} s: {:,.1f} MB/s".format(
+        size / 2 ** 20, elapsed, size / 2 ** 20 / elapsed), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
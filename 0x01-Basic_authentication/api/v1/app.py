@@ -13,11 +13,14 @@ import os
 app = Flask(__name__)
 app.register_blueprint(app_views)
 CORS(app, resources={r"/api/v1/*": {"origins": "*"}})
+EXCLUDED_PATHS = ['/api/v1/status/', '/api/v1/unauthorized/',
+                  '/api/v1/forbidden/']
 auth = None
 if os.getenv('AUTH_TYPE') == 'basic_auth':
     auth = BasicAuth()
 else:
     auth = Auth()
+auth.add_excluded_paths(EXCLUDED_PATHS)
 
 
 @app.errorhandler(404)
@@ -47,9 +50,7 @@ def before_request() -> str:
     """
     if auth is None:
         return
-    excluded_paths = ['/api/v1/status/', '/api/v1/unauthorized/',
-                      '/api/v1/forbidden/']
-    if auth and auth.require_auth(request.path, excluded_paths):
+    if auth and auth.require_auth(request.path):
         if not auth.authorization_header(request):
             abort(401)
         if not auth.current_user(request):
@@ -4,20 +4,34 @@
 from flask import request
 from typing import List, TypeVar
 from os import getenv
+from api.v1.auth.path_matcher import PathMatcher, compile_paths
 
 
 class Auth:
     """Auth class
     """
-    def require_auth(self, path: str, excluded_paths: List[str]) -> bool:
-        """Checks if authentication is required for the given path."""
-        if path is None or excluded_paths is None or excluded_paths == []:
+    def __init__(self):
+        """Initializes the auth with no excluded path."""
+        self._excluded_paths = PathMatcher()
+
+    def add_excluded_paths(self, excluded_paths: List[str]) -> None:
+        """Registers paths that do not require authentication."""
+        self._excluded_paths.add_all(excluded_paths)
+
+    def require_auth(self, path: str,
+                     excluded_paths: List[str] = None) -> bool:
+        """Checks if authentication is required for the given path.
+
+        Without excluded_paths, the paths registered with
+        add_excluded_paths are used.
+        """
+        if excluded_paths is None:
+            matcher = self._excluded_paths
+        else:
+            matcher = compile_paths(tuple(excluded_paths))
+        if path is None or not len(matcher):
             return True
-        if path[-1] != '/':
-            path += '/'
-        if path in excluded_paths:
-            return False
-        return True
+        return not matcher.match(path)
 
     def authorization_header(self, request=None) -> str:
         """Returns the value of the Authorization header."""
@@ -28,24 +42,3 @@ class Auth:
     def current_user(self, request=None) -> TypeVar('User'):
         """Returns None - not implemented."""
         return None
-
-    def require_auth(self, path, excluded_paths):
-        """ require auth method """
-        if path is None or excluded_paths is None or excluded_paths == []:
-            return True
-
-        # Remove trailing slash from path for consistency
-        path = path.rstrip('/')
-
-        for ex_path in excluded_paths:
-            # Remove trailing slash from excluded path
-            ex_path = ex_path.rstrip('/')
-
-            if ex_path.endswith('*'):
-                # check if path starts with the excluded path (minus the *)
-                if path.startswith(ex_path[:-1]):
-                    return False
-            elif ex_path == path:
-                return False
-
-        return True
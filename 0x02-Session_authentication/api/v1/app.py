@@ -12,6 +12,8 @@ from flask import g
 from api.v1.auth.auth import Auth
 from api.v1.auth.basic_auth import BasicAuth
 from api.v1.auth.session_auth import SessionAuth
+from api.v1.auth.session_exp_auth import SessionExpAuth
+from api.v1.auth.session_db_auth import SessionDBAuth
 from api.v1.views import app_views
 
 # Initialize the Flask application and register blueprints
@@ -19,16 +21,30 @@ app = Flask(__name__)
 app.register_blueprint(app_views)
 CORS(app, resources={r"/api/v1/*": {"origins": "*"}})
 
+# Paths that do not require authentication
+EXCLUDED_PATHS = [
+    '/api/v1/status/',
+    '/api/v1/unauthorized/',
+    '/api/v1/forbidden/',
+    '/api/v1/auth_session/login/'
+]
+
 # Determine the authentication type based on the environment variable AUTH_TYPE
 auth_type = os.getenv('AUTH_TYPE', 'default')
 
 # Instantiate the appropriate authentication class based on the auth_type
-if auth_type == "session_auth":
+if auth_type == "session_db_auth":
+    auth = SessionDBAuth()
+elif auth_type == "session_exp_auth":
+    auth = SessionExpAuth()
+elif auth_type == "session_auth":
     auth = SessionAuth()
 elif auth_type == "basic_auth":
     auth = BasicAuth()
 else:
     auth = Auth()
+auth.add_excluded_paths(EXCLUDED_PATHS)
+app.config['AUTH'] = auth
 
 
 @app.errorhandler(404)
@@ -72,16 +88,8 @@ def handle_request():
     if auth is None:
         return
 
-    # Define paths that do not require authentication
-    excluded_paths = [
-        '/api/v1/status/',
-        '/api/v1/unauthorized/',
-        '/api/v1/forbidden/',
-        '/api/v1/auth_session/login/'
-    ]
-
     # Skip authentication if the requested path is in the excluded paths
-    if not auth.require_auth(request.path, excluded_paths):
+    if not auth.require_auth(request.path):
         return
 
     # Check for authentication credentials in the header or session cookie
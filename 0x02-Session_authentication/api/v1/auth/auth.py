@@ -6,36 +6,45 @@ Authentication module.
 import os
 from typing import List, TypeVar
 from flask import request
+from .path_matcher import PathMatcher, compile_paths
 
 
 class Auth:
     """Base class for all authentication systems in this application."""
 
-    def require_auth(self, path: str, excluded_paths: List[str]) -> bool:
+    def __init__(self):
+        """Initializes the auth with no excluded path."""
+        self._excluded_paths = PathMatcher()
+
+    def add_excluded_paths(self, excluded_paths: List[str]) -> None:
+        """Registers paths that do not require authentication.
+
+        Args:
+            excluded_paths (List[str]): Exact paths, or prefixes ending
+            with `*`. Trailing slashes are ignored.
+        """
+        self._excluded_paths.add_all(excluded_paths)
+
+    def require_auth(self, path: str,
+                     excluded_paths: List[str] = None) -> bool:
         """Determines whether a given path requires authentication.
 
         Args:
             path (str): The path to be checked.
-            excluded_paths (List[str]): A list of paths that are excluded from
-            authentication.
+            excluded_paths (List[str], optional): A list of paths that are
+            excluded from authentication. Defaults to the paths registered
+            with add_excluded_paths.
 
         Returns:
             bool: True if authentication is required, False otherwise.
         """
-        if not path or not excluded_paths:
+        if excluded_paths is None:
+            matcher = self._excluded_paths
+        else:
+            matcher = compile_paths(tuple(excluded_paths))
+        if not path or not len(matcher):
             return True
-
-        normalized_path = path.rstrip('/')
-
-        for excluded_path in excluded_paths:
-            if excluded_path.endswith('*') and \
-             normalized_path.startswith(excluded_path[:-1]):
-                return False
-
-            if normalized_path == excluded_path.rstrip('/'):
-                return False
-
-        return True
+        return not matcher.match(path)
 
     def authorization_header(self, request=None) -> str:
         """Retrieves the Authorization header from the request.
@@ -3,6 +3,7 @@
 """
 
 from api.v1.auth.auth import Auth
+from api.v1.auth.credential_cache import CredentialCache
 import base64
 from flask import request
 from models.user import User
@@ -13,6 +14,20 @@ from os import getenv
 class BasicAuth(Auth):
     """BasicAuth class
     """
+    def __init__(self):
+        """ Init with a cache of already validated Authorization headers
+        """
+        super().__init__()
+        self.credential_cache = CredentialCache(
+            max_size=int(getenv('BASIC_AUTH_CACHE_SIZE', 1024)),
+            ttl=float(getenv('BASIC_AUTH_CACHE_TTL', 300)))
+        User.subscribe(self._on_user_change)
+
+    def _on_user_change(self, event: str, user: TypeVar('User')):
+        """ drop cached credentials of a saved or removed user
+        """
+        self.credential_cache.invalidate_user(user.id)
+
     def extract_base64_authorization_header(self, auth_head: str) -> str:
         """ extract base64 authorization header
         """
@@ -68,13 +83,27 @@ class BasicAuth(Auth):
                 return u
 
     def current_user(self, request=None) -> TypeVar('User'):
-        """ current user
+        """ current user, served from the credential cache when the same
+        Authorization header was already validated
         """
         auth_head = self.authorization_header(request)
+        if not isinstance(auth_head, str):
+            return None
+        cache = self.credential_cache
+        digest = cache.digest(auth_head)
+        cached = cache.get(digest)
+        if cached is not None:
+            user = User.get(cached[0])
+            if user is not None and user.password == cached[1]:
+                return user
+            cache.discard(digest)
         b64_auth = self.extract_base64_authorization_header(auth_head)
         decoded = self.decode_base64_authorization_header(b64_auth)
         user_email, user_pwd = self.extract_user_credentials(decoded)
-        return self.user_object_from_credentials(user_email, user_pwd)
+        user = self.user_object_from_credentials(user_email, user_pwd)
+        if user is not None:
+            cache.put(digest, user.id, user.password)
+        return user
 
     def extract_user_credentials(self, b64_auth: str) -> (str, str):
         """ extract user credentials
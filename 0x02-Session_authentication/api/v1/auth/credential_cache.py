@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""Bounded LRU/TTL cache of authenticated Authorization headers.
+"""
+
+import hashlib
+import hmac
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+
+class CredentialCache:
+    """Maps a keyed digest of an Authorization header to a user id.
+
+    Headers are never stored: entries are keyed by an HMAC-SHA256 of the
+    header under a per-process random key. Each entry also keeps the
+    password hash it was validated against so callers can reject it
+    after a password change.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 300):
+        """Initializes the cache.
+
+        Args:
+            max_size (int): Maximum number of entries, least recently
+             used ones are evicted first.
+            ttl (float): Seconds an entry stays valid.
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._key = os.urandom(32)
+        self._entries = OrderedDict()
+        self._by_user = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def digest(self, header: str) -> bytes:
+        """Returns the cache key of an Authorization header.
+
+        Args:
+            header (str): The Authorization header value.
+
+        Returns:
+            bytes: The keyed digest of the header.
+        """
+        return hmac.new(self._key, header.encode('utf-8'),
+                        hashlib.sha256).digest()
+
+    def get(self, digest: bytes) -> Optional[Tuple[str, str]]:
+        """Looks up a digest.
+
+        Args:
+            digest (bytes): Key returned by `digest`.
+
+        Returns:
+            Optional[Tuple[str, str]]: (user id, password hash) or None
+             on a miss.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None or entry[2] <= now:
+                if entry is not None:
+                    self._drop(digest)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(digest)
+            self.hits += 1
+            return entry[0], entry[1]
+
+    def put(self, digest: bytes, user_id: str, password_hash: str) -> None:
+        """Caches a successful authentication.
+
+        Args:
+            digest (bytes): Key returned by `digest`.
+            user_id (str): The authenticated user id.
+            password_hash (str): The password hash it was checked against.
+        """
+        with self._lock:
+            if digest in self._entries:
+                self._drop(digest)
+            self._entries[digest] = (user_id, password_hash,
+                                     time.monotonic() + self.ttl)
+            self._by_user.setdefault(user_id, set()).add(digest)
+            while len(self._entries) > self.max_size:
+                self._drop(next(iter(self._entries)))
+
+    def discard(self, digest: bytes) -> None:
+        """Drops one entry found to be stale.
+
+        Args:
+            digest (bytes): Key returned by `digest`.
+        """
+        with self._lock:
+            if digest in self._entries:
+                self._drop(digest)
+                self.invalidations += 1
+
+    def invalidate_user(self, user_id: str) -> None:
+        """Drops all entries of a user.
+
+        Args:
+            user_id (str): The user whose entries are dropped.
+        """
+        with self._lock:
+            for digest in list(self._by_user.get(user_id, ())):
+                self._drop(digest)
+                self.invalidations += 1
+
+    def stats(self) -> Dict[str, int]:
+        """Returns the cache counters.
+
+        Returns:
+            Dict[str, int]: size, hits, misses and invalidations.
+        """
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations,
+            }
+
+    def _drop(self, digest: bytes) -> None:
+        """Removes an entry, the lock must be held."""
+        user_id = self._entries.pop(digest)[0]
+        digests = self._by_user.get(user_id)
+        if digests is not None:
+            digests.discard(digest)
+            if not digests:
+                del self._by_user[user_id]
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""Timer wheel indexing session expiry deadlines.
+"""
+
+import threading
+import time
+from typing import Callable, Hashable, List
+
+NS_PER_SECOND = 1000000000
+
+
+class ExpiryWheel:
+    """Hashed timer wheel of monotonic nanosecond deadlines.
+
+    Each key lands in the slot of its deadline tick. Advancing the wheel
+    only visits the slots of the ticks that went by, so a key is looked
+    at once per revolution and reaping is amortized O(1) per key.
+    """
+
+    def __init__(self, slots: int = 512, tick: float = 1.0):
+        """Initializes an empty wheel.
+
+        Args:
+            slots (int): Number of slots of the wheel.
+            tick (float): Seconds covered by one slot.
+        """
+        self._tick_ns = max(1, int(tick * NS_PER_SECOND))
+        self._slots = [[] for _ in range(slots)]
+        self._current = time.monotonic_ns() // self._tick_ns
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self.expired = 0
+
+    @staticmethod
+    def now() -> int:
+        """Returns the current monotonic time in nanoseconds."""
+        return time.monotonic_ns()
+
+    @staticmethod
+    def deadline(seconds: float) -> int:
+        """Returns the monotonic deadline `seconds` from now.
+
+        Args:
+            seconds (float): Time to live.
+
+        Returns:
+            int: Deadline in monotonic nanoseconds.
+        """
+        return time.monotonic_ns() + int(seconds * NS_PER_SECOND)
+
+    def schedule(self, key: Hashable, deadline: int) -> None:
+        """Registers a key to expire at a deadline.
+
+        Args:
+            key (Hashable): The key, a session ID.
+            deadline (int): Monotonic nanosecond deadline.
+        """
+        tick = -(-deadline // self._tick_ns)
+        with self._lock:
+            # a tick already swept must wait for the next one
+            tick = max(tick, self._current + 1)
+            self._slots[tick % len(self._slots)].append((deadline, key))
+
+    def advance(self, now: int = None) -> List[Hashable]:
+        """Moves the wheel to `now` and returns the keys now expired.
+
+        Args:
+            now (int, optional): Monotonic nanoseconds, defaults to now.
+
+        Returns:
+            List[Hashable]: The keys whose deadline passed.
+        """
+        if now is None:
+            now = self.now()
+        now_tick = now // self._tick_ns
+        due = []
+        with self._lock:
+            steps = min(now_tick - self._current, len(self._slots))
+            for step in range(1, steps + 1):
+                index = (self._current + step) % len(self._slots)
+                keep = []
+                for entry in self._slots[index]:
+                    (due if entry[0] <= now else keep).append(entry)
+                self._slots[index] = keep
+            self._current = max(self._current, now_tick)
+        return [key for _, key in due]
+
+    def start(self, reap: Callable[[Hashable], bool]) -> None:
+        """Starts a daemon thread advancing the wheel every tick.
+
+        Args:
+            reap (Callable[[Hashable], bool]): Called with each expired
+             key, returns True if it actually removed something.
+        """
+        def _run():
+            while not self._stop.wait(self._tick_ns / NS_PER_SECOND):
+                for key in self.advance():
+                    if reap(key):
+                        self.expired += 1
+
+        threading.Thread(target=_run, daemon=True).start()
+
+    def stop(self) -> None:
+        """Stops the background thread."""
+        self._stop.set()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""Compiled matcher for paths excluded from authentication.
+"""
+
+import functools
+from typing import Iterable, Tuple
+
+# Key marking the end of a wildcard prefix in the trie; path characters
+# are one character long so it can never collide with them.
+_WILDCARD = ''
+
+
+class PathMatcher:
+    """Matches paths against exact and `*` wildcard patterns.
+
+    Trailing slashes are ignored. Exact patterns live in a set, wildcard
+    prefixes in a character trie, so a match costs O(len(path)) however
+    many patterns are registered.
+    """
+
+    def __init__(self, patterns: Iterable[str] = ()):
+        """Compiles the given patterns.
+
+        Args:
+            patterns (Iterable[str]): Excluded path patterns.
+        """
+        self._exact = set()
+        self._trie = {}
+        self._size = 0
+        self.add_all(patterns)
+
+    def add(self, pattern: str) -> None:
+        """Registers one pattern.
+
+        Args:
+            pattern (str): An exact path, or a prefix ending with `*`.
+        """
+        self._size += 1
+        if not pattern.endswith('*'):
+            self._exact.add(pattern.rstrip('/'))
+            return
+        node = self._trie
+        for char in pattern[:-1]:
+            node = node.setdefault(char, {})
+        node[_WILDCARD] = True
+
+    def add_all(self, patterns: Iterable[str]) -> None:
+        """Registers several patterns.
+
+        Args:
+            patterns (Iterable[str]): Excluded path patterns.
+        """
+        for pattern in patterns:
+            self.add(pattern)
+
+    def match(self, path: str) -> bool:
+        """Tells whether a path is excluded.
+
+        Args:
+            path (str): The request path.
+
+        Returns:
+            bool: True if a pattern matches the path.
+        """
+        normalized = path.rstrip('/')
+        if normalized in self._exact:
+            return True
+        node = self._trie
+        if _WILDCARD in node:
+            return True
+        for char in normalized:
+            node = node.get(char)
+            if node is None:
+                return False
+            if _WILDCARD in node:
+                return True
+        return False
+
+    def __len__(self) -> int:
+        """Number of registered patterns."""
+        return self._size
+
+
+@functools.lru_cache(maxsize=32)
+def compile_paths(patterns: Tuple[str, ...]) -> PathMatcher:
+    """Returns a shared PathMatcher for a tuple of patterns.
+
+    Args:
+        patterns (Tuple[str, ...]): Excluded path patterns.
+
+    Returns:
+        PathMatcher: The compiled matcher.
+    """
+    return PathMatcher(patterns)
@@ -2,14 +2,18 @@
 """Module for session-based authentication in the API.
 """
 
+from typing import TypeVar
 from uuid import uuid4
 from .auth import Auth
+from .session_store import make_session_store
 from models.user import User
 from flask import g
 
 
 class SessionAuth(Auth):
     """Handles session-based authentication, inheriting from Auth."""
+    user_id_by_session_id = make_session_store()
+
     def create_session(self, user_id: str = None) -> str:
         """Creates a session for a user."""
         if user_id is None:
@@ -40,5 +44,5 @@ class SessionAuth(Auth):
         user_id = self.user_id_for_session_id(session_id)
         if user_id is None:
             return False
-        del self.user_id_by_session_id[session_id]
+        self.user_id_by_session_id.pop(session_id, None)
         return True
@@ -1,39 +1,93 @@
 #!/usr/bin/env python3
 """Module for session db authentication"""
 
+import os
 from datetime import datetime, timedelta
+from .expiry_wheel import NS_PER_SECOND, ExpiryWheel
 from .session_exp_auth import SessionExpAuth
 from models.user_session import UserSession
+from models.write_buffer import WriteBuffer
 
 
 class SessionDBAuth(SessionExpAuth):
     """Session DB Auth class"""
+    def __init__(self):
+        """Init method, session writes go through a write-behind buffer"""
+        super().__init__()
+        UserSession.load_from_file()
+        self.write_buffer = WriteBuffer(
+            UserSession,
+            max_pending=int(os.getenv('SESSION_FLUSH_SIZE', 100)),
+            max_delay=float(os.getenv('SESSION_FLUSH_INTERVAL', 1)))
+        if self.session_duration > 0:
+            self._schedule_loaded_sessions()
+
+    def _schedule_loaded_sessions(self) -> None:
+        """Put the sessions loaded from the file on the expiry wheel, so
+        the ones from previous runs get reaped too"""
+        now = datetime.utcnow()
+        for user_session in UserSession.all():
+            remaining = user_session.created_at + \
+                timedelta(seconds=self.session_duration) - now
+            self.expiry_wheel.schedule(
+                user_session.session_id,
+                ExpiryWheel.now() +
+                int(remaining.total_seconds() * NS_PER_SECOND))
+
+    def _reap_session(self, session_id: str) -> bool:
+        """Drops an expired session and its persisted UserSession rows"""
+        reaped = super()._reap_session(session_id)
+        for user_session in UserSession.search({'session_id': session_id}):
+            self.write_buffer.remove(user_session)
+            reaped = True
+        return reaped
+
     def create_session(self, user_id: str = None) -> str:
         """Create a session"""
-
-        if isinstance(user_id, str):
-            kwargs = {
-                'user_id' = user_id
-                'session_id' = session_id
-            }
-            user_session = UserSession(**kwargs)
-            user_session.save()
-            return user_session.session_id
+        session_id = super().create_session(user_id)
+        if session_id is None:
+            return None
+        user_session = UserSession(user_id=user_id, session_id=session_id)
+        self.write_buffer.save(user_session)
+        return session_id
 
     def user_id_for_session_id(self, session_id: str = None) -> str:
         """User ID for session ID"""
         if session_id is None:
             return None
-        user_session = UserSession.get(session_id)
-        if user_session is None:
+        user_sessions = UserSession.search({'session_id': session_id})
+        if not user_sessions:
             return None
-        if user_session.expired_at < datetime.now():
+        user_session = user_sessions[0]
+        if self.session_duration <= 0:
+            return user_session.user_id
+        expires_at = user_session.created_at + \
+            timedelta(seconds=self.session_duration)
+        if expires_at < datetime.utcnow():
             return None
         return user_session.user_id
 
-    def destroy_session(self, user_id: str) -> None:
-        """Destroy a session"""
+    def destroy_session(self, request=None) -> bool:
+        """Destroy the session of the request cookie"""
+        session_id = self.session_cookie(request)
+        if session_id is None:
+            return False
+        user_sessions = UserSession.search({'session_id': session_id})
+        if not user_sessions:
+            return False
+        for user_session in user_sessions:
+            self.write_buffer.remove(user_session)
+        self.user_id_by_session_id.pop(session_id, None)
+        return True
+
+    def destroy_user_sessions(self, user_id: str) -> int:
+        """Destroy all sessions of a user, O(sessions of the user)"""
         user_sessions = UserSession.search({'user_id': user_id})
         for user_session in user_sessions:
-            user_session.remove()
-        return None
+            self.write_buffer.remove(user_session)
+            self.user_id_by_session_id.pop(user_session.session_id, None)
+        return len(user_sessions)
+
+    def flush(self, durable: bool = True) -> None:
+        """Persist buffered session changes now"""
+        self.write_buffer.flush(durable)
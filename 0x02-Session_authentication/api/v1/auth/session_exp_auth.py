@@ -2,7 +2,9 @@
 """Module for session authentication"""
 
 import os
-from datetime import datetime as dt, timedelta
+from datetime import datetime as dt
+from typing import Dict
+from .expiry_wheel import ExpiryWheel
 from .session_auth import SessionAuth
 
 
@@ -10,23 +12,32 @@ class SessionExpAuth(SessionAuth):
     """Session Exp Auth class"""
     def __init__(self):
         """Init method"""
-        session_duration = int(os.getenv('SESSION_DURATION'))
-        self.session_duration = timedelta(seconds=session_duration)
+        super().__init__()
+        try:
+            self.session_duration = int(os.getenv('SESSION_DURATION'))
+        except (TypeError, ValueError):
+            self.session_duration = 0
+        self.expiry_wheel = ExpiryWheel()
+        if self.session_duration > 0:
+            self.expiry_wheel.start(self._reap_session)
 
     def create_session(self, user_id: str = None) -> str:
         """Create a session"""
         session_id = super().create_session(user_id)
         if session_id is None:
             return None
+        expires_at = ExpiryWheel.deadline(self.session_duration)
         session_dictionary = {
             'user_id': user_id,
-            'created_at': dt.now()
+            'created_at': dt.now(),
+            # monotonic nanoseconds, immune to wall clock changes
+            'expires_at': expires_at,
         }
         self.user_id_by_session_id[session_id] = session_dictionary
+        if self.session_duration > 0:
+            self.expiry_wheel.schedule(session_id, expires_at)
         return session_id
 
-    return session_id
-
     def user_id_for_session_id(self, session_id: str = None) -> str:
         """Returns the user ID associated with the given session ID.
 
@@ -37,37 +48,39 @@ class SessionExpAuth(SessionAuth):
             str: The user ID associated with the session ID,
                  or None if the session ID is invalid or expired.
         """
-        """User ID for session ID"""
         if session_id is None:
             return None
-        # If the user_id_by_session_id dictionary does not contain the
-        # session_id, return None
-        if session_id not in self.user_id_by_session_id:
-            return None
-        # Get the session info from the user_id_by_session_id dictionary
         session_dict = self.user_id_by_session_id.get(session_id)
         if session_dict is None:
             return None
-        # If the session_duration is 0 or less, return the user_id
+        # If the session_duration is 0 or less, sessions never expire
         if self.session_duration <= 0:
             return session_dict.get("user_id")
-        # Get created_at from session info
-        created_at = session_dict.get('created_at')
-        # If the created_at key does not exist in the session dictionary,
-        # return None
-        if created_at is None:
-            return None
-        # Check if the session has expired
-        now = dt.now()
-        if created_at + timedelta(seconds=self.session_duration) < now:
+        expires_at = session_dict.get('expires_at')
+        if expires_at is None:
             return None
-        # Calculate the session expiration date
-        expires_at = session_dict["created_at"] + \
-            timedelta(seconds=self.session_duration)
-        # Return None if the current time is past the expiration date
-        if expires_at < dt.now():
+        # Expired but not reaped yet by the expiry wheel
+        if expires_at <= ExpiryWheel.now():
             return None
-        # Return the user_id from the session dictionary if the session
-        # has not expired
         return session_dict.get("user_id", None)
-    
\ No newline at end of file
+
+    def session_counts(self) -> Dict[str, int]:
+        """Returns the number of live sessions and of reaped ones.
+
+        Returns:
+            Dict[str, int]: live and expired session counts.
+        """
+        return {
+            'live': len(self.user_id_by_session_id),
+            'expired': self.expiry_wheel.expired,
+        }
+
+    def _reap_session(self, session_id: str) -> bool:
+        """Drops a session whose deadline passed."""
+        session_dict = self.user_id_by_session_id.get(session_id)
+        if not isinstance(session_dict, dict):
+            return False
+        expires_at = session_dict.get('expires_at')
+        if expires_at is None or expires_at > ExpiryWheel.now():
+            return False
+        return self.user_id_by_session_id.pop(session_id, None) is not None
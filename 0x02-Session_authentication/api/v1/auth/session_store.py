@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""Thread-safe in-memory session stores.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict
+
+_MISSING = object()
+
+
+class SessionStore:
+    """Session id -> session value mapping guarded by one lock.
+
+    Supports the dict operations the session auth classes use. When
+    `max_size` is set, the least recently used session is evicted on
+    insert once the store is full.
+    """
+
+    def __init__(self, max_size: int = None):
+        """Initializes an empty store.
+
+        Args:
+            max_size (int, optional): Maximum number of sessions.
+        """
+        self.max_size = max_size
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __setitem__(self, session_id: str, value: Any) -> None:
+        """Stores a session, evicting the oldest one when full."""
+        with self._lock:
+            self._data[session_id] = value
+            self._data.move_to_end(session_id)
+            if self.max_size is not None:
+                while len(self._data) > self.max_size:
+                    self._data.popitem(last=False)
+                    self.evictions += 1
+
+    def __getitem__(self, session_id: str) -> Any:
+        """Returns a session, raises KeyError if unknown."""
+        value = self.get(session_id, _MISSING)
+        if value is _MISSING:
+            raise KeyError(session_id)
+        return value
+
+    def __delitem__(self, session_id: str) -> None:
+        """Deletes a session, raises KeyError if unknown."""
+        with self._lock:
+            del self._data[session_id]
+
+    def __contains__(self, session_id: str) -> bool:
+        """True if the session exists."""
+        with self._lock:
+            return session_id in self._data
+
+    def __len__(self) -> int:
+        """Number of sessions."""
+        return len(self._data)
+
+    def get(self, session_id: str, default: Any = None) -> Any:
+        """Returns a session and marks it as recently used.
+
+        Args:
+            session_id (str): The session ID.
+            default (Any): Value returned for an unknown session.
+
+        Returns:
+            Any: The session value or default.
+        """
+        with self._lock:
+            value = self._data.get(session_id, _MISSING)
+            if value is _MISSING:
+                return default
+            self._data.move_to_end(session_id)
+            return value
+
+    def pop(self, session_id: str, default: Any = None) -> Any:
+        """Removes a session and returns its value, or default."""
+        with self._lock:
+            return self._data.pop(session_id, default)
+
+    def stats(self) -> Dict[str, int]:
+        """Returns the number of sessions and evictions."""
+        return {'sessions': len(self._data), 'evictions': self.evictions}
+
+
+class ShardedSessionStore:
+    """Session store split into lock-striped SessionStore shards.
+
+    Sessions are spread over the shards by hash so concurrent requests
+    rarely wait on the same lock. LRU eviction is applied per shard.
+    """
+
+    def __init__(self, shards: int = 16, max_size: int = None):
+        """Initializes the shards.
+
+        Args:
+            shards (int): Number of shards.
+            max_size (int, optional): Maximum number of sessions overall.
+        """
+        per_shard = None
+        if max_size is not None:
+            per_shard = max(1, -(-max_size // shards))
+        self._shards = [SessionStore(per_shard) for _ in range(shards)]
+
+    def _shard(self, session_id: str) -> SessionStore:
+        """Returns the shard owning a session id."""
+        return self._shards[hash(session_id) % len(self._shards)]
+
+    def __setitem__(self, session_id: str, value: Any) -> None:
+        """Stores a session."""
+        self._shard(session_id)[session_id] = value
+
+    def __getitem__(self, session_id: str) -> Any:
+        """Returns a session, raises KeyError if unknown."""
+        return self._shard(session_id)[session_id]
+
+    def __delitem__(self, session_id: str) -> None:
+        """Deletes a session, raises KeyError if unknown."""
+        del self._shard(session_id)[session_id]
+
+    def __contains__(self, session_id: str) -> bool:
+        """True if the session exists."""
+        return session_id in self._shard(session_id)
+
+    def __len__(self) -> int:
+        """Number of sessions."""
+        return sum(len(shard) for shard in self._shards)
+
+    def get(self, session_id: str, default: Any = None) -> Any:
+        """Returns a session, or default if unknown."""
+        return self._shard(session_id).get(session_id, default)
+
+    def pop(self, session_id: str, default: Any = None) -> Any:
+        """Removes a session and returns its value, or default."""
+        return self._shard(session_id).pop(session_id, default)
+
+    def stats(self) -> Dict[str, int]:
+        """Returns the number of sessions and evictions."""
+        return {
+            'sessions': len(self),
+            'evictions': sum(shard.evictions for shard in self._shards),
+        }
+
+
+def make_session_store():
+    """Builds the session store selected by the environment.
+
+    SESSION_STORE is "sharded" (default) or "memory" for a single lock;
+    SESSION_STORE_SHARDS and SESSION_STORE_MAX_SIZE tune it.
+
+    Returns:
+        The session store instance.
+    """
+    max_size = os.getenv('SESSION_STORE_MAX_SIZE')
+    max_size = int(max_size) if max_size else None
+    if os.getenv('SESSION_STORE', 'sharded') == 'memory':
+        return SessionStore(max_size)
+    shards = int(os.getenv('SESSION_STORE_SHARDS', 16))
+    return ShardedSessionStore(shards, max_size)
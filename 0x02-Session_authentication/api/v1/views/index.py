@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """ Module of Index views
 """
-from flask import jsonify, abort
+from flask import jsonify, abort, current_app
 from api.v1.views import app_views
 
 
@@ -19,10 +19,14 @@ def stats() -> str:
     """ GET /api/v1/stats
     Return:
       - the number of each objects
+      - the Basic auth credential cache counters, when enabled
     """
     from models.user import User
     stats = {}
     stats['users'] = User.count()
+    cache = getattr(current_app.config.get('AUTH'), 'credential_cache', None)
+    if cache is not None:
+        stats['credential_cache'] = cache.stats()
     return jsonify(stats)
 
 
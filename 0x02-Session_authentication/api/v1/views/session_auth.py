@@ -4,8 +4,7 @@
 
 import os
 from typing import Tuple
-from flask import Flask, abort, jsonify, request
-from api.v1.app import auth
+from flask import Flask, abort, current_app, jsonify, request
 from api.v1.views import app_views
 from models.user import User
 
@@ -23,6 +22,7 @@ def session_auth_login() -> Tuple[str, int]:
     user = user[0]
     if not user.is_valid_password(password):
         return jsonify({"error": "wrong password"}), 401
+    auth = current_app.config['AUTH']
     session_id = auth.create_session(user.id)
     response = jsonify(user.to_json())
     response.set_cookie(os.getenv('SESSION_NAME'), session_id)
@@ -35,6 +35,7 @@ def session_auth_logout() -> Tuple[str, int]:
     session_id = request.cookies.get(os.getenv('SESSION_NAME'))
     if session_id is None:
         return jsonify({"error": "session_id missing"}), 403
+    auth = current_app.config['AUTH']
     if not auth.destroy_session(request):
         return jsonify({"error": "session_id unknown"}), 403
     return jsonify({}), 200
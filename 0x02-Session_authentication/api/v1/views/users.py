@@ -2,19 +2,65 @@
 """ Module of Users views
 """
 from api.v1.views import app_views
-from flask import abort, jsonify, request
+from flask import Response, abort, jsonify, request, url_for
+from models.base import json_dumps
 from models.user import User
 from flask import g
 
 
+USERS_PAGE_MAX = 1000
+USERS_FILTERS = ('email', 'first_name', 'last_name')
+
+
 @app_views.route('/users', methods=['GET'], strict_slashes=False)
 def view_all_users() -> str:
     """ GET /api/v1/users
+    Query parameters (all optional):
+      - limit: page size, at most 1000 (default)
+      - after: id of the last user of the previous page
+      - fields: comma separated attributes to return
+      - email, first_name, last_name: exact match filters
     Return:
-      - list of all User objects JSON represented
+      - list of User objects JSON represented, ordered by id and
+        streamed one user at a time
+      - a Link header to the next page when the page is full
+      - 400 if limit is not a positive integer
     """
-    all_users = [user.to_json() for user in User.all()]
-    return jsonify(all_users)
+    try:
+        limit = int(request.args.get('limit', USERS_PAGE_MAX))
+    except ValueError:
+        limit = 0
+    if limit <= 0:
+        return jsonify({'error': "limit must be a positive integer"}), 400
+    limit = min(limit, USERS_PAGE_MAX)
+    after = request.args.get('after')
+    fields = request.args.get('fields')
+    if fields is not None:
+        fields = [f for f in fields.split(',') if f and f[0] != '_']
+    filters = {k: request.args.get(k) for k in USERS_FILTERS
+               if k in request.args}
+    users = User.page(limit, after, filters)
+
+    def encode(user):
+        if fields is None:
+            return user.to_json_string()
+        user_json = user.to_json()
+        return json_dumps({k: user_json[k] for k in fields
+                           if k in user_json})
+
+    def generate():
+        yield '['
+        for i, user in enumerate(users):
+            yield encode(user) if i == 0 else ',' + encode(user)
+        yield ']'
+
+    response = Response(generate(), mimetype='application/json')
+    if len(users) == limit:
+        args = request.args.to_dict()
+        args.update(limit=limit, after=users[-1].id)
+        response.headers['Link'] = '<{}>; rel="next"'.format(
+            url_for('app_views.view_all_users', **args))
+    return response
 
 
 @app_views.route('/users/<user_id>', methods=['GET'], strict_slashes=False)
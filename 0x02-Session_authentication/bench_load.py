@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+""" Startup benchmark: eager vs lazy Base.load_from_file, from the JSON
+file and from the binary snapshot
+
+Usage: ./bench_load.py [users ...]   (default: 100000 1000000)
+"""
+import os
+import sys
+import tempfile
+import time
+import uuid
+from models.base import json_dumps
+from models.snapshot import json_to_snapshot
+from models.user import User
+
+
+def write_users(count: int):
+    """ Write a .db_User.json with count users in the current directory
+    """
+    objs_json = {}
+    for i in range(count):
+        obj_id = str(uuid.uuid4())
+        objs_json[obj_id] = {
+            'id': obj_id,
+            'created_at': '2024-01-01T00:00:00',
+            'updated_at': '2024-01-01T00:00:00',
+            'email': 'user{}@example.com'.format(i),
+            '_password': 'x' * 64,
+            'first_name': 'First{}'.format(i),
+            'last_name': 'Last{}'.format(i),
+        }
+    with open('.db_User.json', 'w') as f:
+        f.write(json_dumps(objs_json))
+    json_to_snapshot('.db_User.json', '.db_User.snap', User.INDEXED_ATTRIBUTES)
+
+
+def measure(lazy: bool, count: int, snapshot_format: str = 'json'):
+    """ Time the load, a first login lookup and a save
+    """
+    User.LAZY_LOAD = lazy
+    User.SNAPSHOT_FORMAT = snapshot_format
+    start = time.perf_counter()
+    User.load_from_file()
+    loaded = time.perf_counter() - start
+    start = time.perf_counter()
+    User.search({'email': 'user{}@example.com'.format(count // 2)})
+    lookup = time.perf_counter() - start
+    start = time.perf_counter()
+    User.save_to_file()
+    saved = time.perf_counter() - start
+    print("{:>9,} users {:<6} {:<6} load {:>7.2f} s   first lookup {:>7.3f} ms"
+          "   save {:>7.2f} s".format(count, snapshot_format,
+                                      'lazy' if lazy else 'eager', loaded,
+                                      lookup * 1000, saved))
+
+
+def main():
+    """ Compare both modes for each size
+    """
+    sizes = [int(a) for a in sys.argv[1:]] or [100000, 1000000]
+    os.chdir(tempfile.mkdtemp())
+    for count in sizes:
+        write_users(count)
+        measure(False, count)
+        measure(True, count)
+        measure(False, count, 'binary')
+        measure(True, count, 'binary')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+""" Memory benchmark: users loaded with Base vs CompactBase models
+
+Each mode runs in a child process since MODEL_COMPACT is read when the
+models are imported.
+
+Usage: ./bench_memory.py [users]   (default: 100000)
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+
+
+def traced(function) -> int:
+    """ Bytes still allocated after calling function, kept alive meanwhile
+    """
+    tracemalloc.start()
+    result = function()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def measure(count: int):
+    """ Print the memory held by count User instances alone (attribute
+    values shared with the records they are built from) and by the
+    whole table loaded from file, indexes included
+    """
+    from bench_load import write_users
+    from models.base import json_loads
+    from models.user import User
+
+    os.chdir(tempfile.mkdtemp())
+    write_users(count)
+    with open('.db_User.json') as f:
+        records = list(json_loads(f.read()).values())
+    instances = traced(lambda: [User(**record) for record in records])
+    del records
+    User.LAZY_LOAD = False
+    table = traced(User.load_from_file)
+    print("{:<8} {:>9,} users   instances {:>5.0f} bytes/user"
+          "   loaded table {:>6.1f} MB".format(
+              'compact' if os.getenv('MODEL_COMPACT') == 'true' else 'dict',
+              count, instances / count, table / 2 ** 20))
+
+
+def main():
+    """ Compare both modes
+    """
+    if len(sys.argv) > 2 and sys.argv[1] == '--child':
+        measure(int(sys.argv[2]))
+        return
+    count = sys.argv[1] if len(sys.argv) > 1 else '100000'
+    for compact in ('false', 'true'):
+        env = dict(os.environ, MODEL_COMPACT=compact,
+                   PYTHONPATH=os.path.dirname(os.path.abspath(__file__)))
+        subprocess.run([sys.executable, __file__, '--child', count],
+                       env=env, check=True)
+
+
+if __name__ == "__main__":
+    main()
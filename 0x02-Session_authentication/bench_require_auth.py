@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+""" Benchmark of Auth.require_auth with thousands of excluded paths
+
+Usage: ./bench_require_auth.py [patterns] [lookups]
+"""
+import random
+import sys
+import time
+from api.v1.auth.auth import Auth
+
+
+def legacy_require_auth(path, excluded_paths):
+    """ require_auth as it was before the compiled matcher
+    """
+    if not path or not excluded_paths:
+        return True
+    normalized_path = path.rstrip('/')
+    for excluded_path in excluded_paths:
+        if excluded_path.endswith('*') and \
+                normalized_path.startswith(excluded_path[:-1]):
+            return False
+        if normalized_path == excluded_path.rstrip('/'):
+            return False
+    return True
+
+
+def main():
+    """ Compares the legacy loop with the registered matcher
+    """
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    lookups = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+    patterns = []
+    for i in range(count):
+        if i % 2:
+            patterns.append('/api/v1/public/{}/'.format(i))
+        else:
+            patterns.append('/api/v1/assets/{}/*'.format(i))
+    paths = ['/api/v1/users/{}'.format(i) for i in range(lookups // 2)]
+    paths += [random.choice(patterns).rstrip('*') + 'x'
+              for _ in range(lookups - len(paths))]
+    random.shuffle(paths)
+
+    auth = Auth()
+    auth.add_excluded_paths(patterns)
+    for label, check in (
+            ('legacy loop', lambda p: legacy_require_auth(p, patterns)),
+            ('compiled', auth.require_auth)):
+        start = time.perf_counter()
+        required = sum(1 for p in paths if check(p))
+        elapsed = time.perf_counter() - start
+        print("{:<12} {:>12,.0f} lookups/sec  ({} require auth)".format(
+            label, lookups / elapsed, required))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+""" Concurrency stress benchmark of the session stores
+
+Serves create/lookup/destroy of sessions from a threaded Flask server
+and hammers it from client threads, once per store backend.
+
+Usage: ./bench_session_store.py [clients] [requests_per_client]
+"""
+import http.client
+import logging
+import sys
+import threading
+import time
+from flask import Flask
+from werkzeug.serving import WSGIRequestHandler, make_server
+from api.v1.auth.session_store import SessionStore, ShardedSessionStore
+from api.v1.auth.session_auth import SessionAuth
+
+
+def make_app(auth: SessionAuth) -> Flask:
+    """ Minimal app exercising the store through SessionAuth
+    """
+    app = Flask(__name__)
+
+    @app.route('/sessions/<user_id>', methods=['POST'])
+    def create(user_id):
+        """ create a session """
+        return auth.create_session(user_id)
+
+    @app.route('/sessions/<session_id>', methods=['GET'])
+    def lookup(session_id):
+        """ look a session up """
+        return auth.user_id_for_session_id(session_id) or ''
+
+    @app.route('/sessions/<session_id>', methods=['DELETE'])
+    def destroy(session_id):
+        """ destroy a session """
+        auth.user_id_by_session_id.pop(session_id, None)
+        return ''
+
+    return app
+
+
+def client(port: int, requests: int, errors: list):
+    """ One keep-alive client: create, 3 lookups, destroy, repeat
+    """
+    conn = http.client.HTTPConnection('127.0.0.1', port)
+    try:
+        for i in range(requests // 5):
+            conn.request('POST', '/sessions/user-{}'.format(i))
+            session_id = conn.getresponse().read().decode()
+            for _ in range(3):
+                conn.request('GET', '/sessions/' + session_id)
+                if conn.getresponse().read().decode() != 'user-{}'.format(i):
+                    errors.append(session_id)
+            conn.request('DELETE', '/sessions/' + session_id)
+            conn.getresponse().read()
+    finally:
+        conn.close()
+
+
+def run(label: str, store, clients: int, requests: int):
+    """ Serves one store and reports requests/sec
+    """
+    SessionAuth.user_id_by_session_id = store
+    WSGIRequestHandler.protocol_version = 'HTTP/1.1'
+    server = make_server('127.0.0.1', 0, make_app(SessionAuth()),
+                         threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    errors = []
+    threads = [threading.Thread(target=client,
+                                args=(server.port, requests, errors))
+               for _ in range(clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+    total = clients * (requests // 5) * 5
+    print("{:<8} {:>10,.0f} req/sec  {} errors  {} sessions left".format(
+        label, total / elapsed, len(errors), len(store)))
+
+
+def main():
+    """ Runs the stress test against each backend
+    """
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    requests = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    print("{} clients x {} requests".format(clients, requests))
+    run('memory', SessionStore(), clients, requests)
+    run('sharded', ShardedSessionStore(), clients, requests)
+
+
+if __name__ == "__main__":
+    main()
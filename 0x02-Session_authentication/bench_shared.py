@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+""" Multi-process benchmark of the file store
+
+Worker processes create and update users in the same directory at the
+same time, then a fresh process counts what reached the files. Runs
+once with the default store (each process rewrites the whole file) and
+once with MODEL_SHARED=true.
+
+Usage: ./bench_shared.py [processes] [users_per_process]
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def work(name: str, count: int, start: float):
+    """ Create count users, renaming every tenth one, and print the
+    number of users this process sees in the end
+    """
+    from models.user import User
+
+    User.load_from_file()
+    time.sleep(max(0, start - time.time()))
+    for i in range(count):
+        user = User(email='{}-{}@example.com'.format(name, i))
+        user.save()
+        if i % 10 == 0:
+            user.first_name = 'Renamed'
+            user.save()
+        User.count()
+    print(User.count())
+
+
+def check() -> tuple:
+    """ Print (users, renamed users) found in the files
+    """
+    from models.user import User
+
+    User.load_from_file()
+    print(User.count(), len(User.search({'first_name': 'Renamed'})))
+
+
+def run(shared: bool, processes: int, count: int):
+    """ Run the workers in a new directory and report lost writes
+    """
+    env = dict(os.environ, MODEL_SHARED='true' if shared else 'false',
+               PYTHONPATH=os.path.dirname(os.path.abspath(__file__)))
+    cwd = tempfile.mkdtemp()
+    start = time.time() + 1
+    workers = [subprocess.Popen([sys.executable, __file__, '--work',
+                                 'w{}'.format(p), str(count), str(start)],
+                                cwd=cwd, env=env, stdout=subprocess.PIPE)
+               for p in range(processes)]
+    seen = [int(w.communicate()[0]) for w in workers]
+    elapsed = time.time() - start
+    found, renamed = subprocess.run(
+        [sys.executable, __file__, '--check'], cwd=cwd, env=env,
+        stdout=subprocess.PIPE, check=True).stdout.split()
+    expected = processes * count
+    print("{:<8} {:>7,.0f} writes/sec   users {:>6}/{}   renamed {:>5}/{}"
+          "   seen by workers {}..{}".format(
+              'shared' if shared else 'default', expected * 1.1 / elapsed,
+              int(found), expected, int(renamed), -(-count // 10) * processes,
+              min(seen), max(seen)))
+
+
+def main():
+    """ Compare the default and shared stores
+    """
+    if len(sys.argv) > 1 and sys.argv[1] == '--work':
+        work(sys.argv[2], int(sys.argv[3]), float(sys.argv[4]))
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == '--check':
+        check()
+        return
+    processes = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    print("{} processes x {} users".format(processes, count))
+    run(False, processes, count)
+    run(True, processes, count)
+
+
+if __name__ == "__main__":
+    main()
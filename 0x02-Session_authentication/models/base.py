@@ -2,39 +2,152 @@
 """ Base module
 """
 from datetime import datetime
-from typing import TypeVar, List, Iterable
-from os import path
+from typing import Callable, TypeVar, List, Iterable
+from os import getenv, path
+from models.column_store import ColumnStore
+from models.journal import Journal
+from models.lazy_store import LazyStore
+from models.shared_state import SharedState
+from models.snapshot import SnapshotReader, encode_record, write_snapshot
+from models.sorted_index import SortedIndex, prefix_range
+from itertools import islice
 import json
+import os
+import threading
 import uuid
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S"
 DATA = {}
+INDEXES = {}
+SORTED_IDS = {}
+SORTED_INDEXES = {}
+JOURNALS = {}
+LISTENERS = {}
+SNAPSHOTS = {}
+COLUMNS = {}
+SHARED_STATES = {}
+TIMESTAMP_ATTRIBUTES = ('created_at', 'updated_at')
+# Per-object cache of serialized forms, never serialized itself
+JSON_CACHE = '_json_cache'
+
+
+def json_loads(text: str):
+    """ Decode a JSON string, with orjson when it is installed
+    """
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def parse_timestamp(value: str) -> datetime:
+    """ Parse a TIMESTAMP_FORMAT string, fromisoformat being much faster
+    than strptime for this format
+    """
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return datetime.strptime(value, TIMESTAMP_FORMAT)
+
+
+def json_dumps(obj) -> str:
+    """ Encode to a JSON string, with orjson when it is installed
+    """
+    if orjson is not None:
+        return orjson.dumps(obj).decode('utf-8')
+    return json.dumps(obj)
 
 
 class Base():
     """ Base class
     """
 
+    # Subclasses without __slots__ get a __dict__, see CompactBase
+    __slots__ = ()
+
+    # Attributes with a secondary hash index: value -> set of ids
+    INDEXED_ATTRIBUTES = ()
+    # Attributes with a sorted index: (value, id) pairs for the range and
+    # prefix conditions of query()
+    SORTED_ATTRIBUTES = ()
+    # Append one journal record per save/remove instead of rewriting the
+    # whole file; the journal is compacted into the file periodically
+    JOURNAL = getenv('MODEL_JOURNAL', 'false').lower() == 'true'
+    JOURNAL_COMPACT_EVERY = int(getenv('MODEL_JOURNAL_COMPACT_EVERY', 1000))
+    # Files shared by several processes (e.g. gunicorn workers): journal
+    # writes under an exclusive file lock, and each process applies the
+    # records of the others before reading or writing
+    SHARED = getenv('MODEL_SHARED', 'false').lower() == 'true'
+    # Keep loaded records raw and build objects on first access
+    LAZY_LOAD = getenv('MODEL_LAZY_LOAD', 'false').lower() == 'true'
+    # File format of save_to_file: "json" (.db_<Class>.json) or "binary"
+    # (.db_<Class>.snap, memory-mapped and read record by record)
+    SNAPSHOT_FORMAT = getenv('MODEL_SNAPSHOT_FORMAT', 'json')
+    # Attributes mirrored in a ColumnStore (when numpy is installed) to
+    # evaluate query() with vectorized masks
+    COLUMN_ATTRIBUTES = ()
+    COLUMNAR = getenv('MODEL_COLUMNAR', 'false').lower() == 'true'
+
     def __init__(self, *args: list, **kwargs: dict):
         """ Initialize a Base instance
         """
         s_class = str(self.__class__.__name__)
         if DATA.get(s_class) is None:
             DATA[s_class] = {}
+            self.__class__._reset_indexes()
 
-        self.id = kwargs.get('id', str(uuid.uuid4()))
+        self.id = kwargs['id'] if 'id' in kwargs else str(uuid.uuid4())
         if kwargs.get('created_at') is not None:
-            self.created_at = datetime.strptime(kwargs.get('created_at'),
-                                                TIMESTAMP_FORMAT)
+            self.created_at = parse_timestamp(kwargs.get('created_at'))
         else:
             self.created_at = datetime.utcnow()
         if kwargs.get('updated_at') is not None:
-            self.updated_at = datetime.strptime(kwargs.get('updated_at'),
-                                                TIMESTAMP_FORMAT)
+            self.updated_at = parse_timestamp(kwargs.get('updated_at'))
         else:
             self.updated_at = datetime.utcnow()
 
+    def __setattr__(self, name: str, value):
+        """ Set an attribute, keeping secondary indexes up to date and
+        dropping cached serialized forms
+        """
+        self._drop_json_forms()
+        if (name in self.INDEXED_ATTRIBUTES or name in self.SORTED_ATTRIBUTES
+                or name in self.COLUMN_ATTRIBUTES) and self._is_stored():
+            old = getattr(self, name, None)
+            super().__setattr__(name, value)
+            # the value as stored, a property may have converted it
+            self._reindex(name, old, getattr(self, name, None))
+        else:
+            super().__setattr__(name, value)
+
+    def _reindex(self, name: str, old, value):
+        """ Move this stored object from the old to the new value of an
+        attribute in the indexes of the attribute
+        """
+        s_class = self.__class__.__name__
+        if name in self.INDEXED_ATTRIBUTES:
+            index = INDEXES[s_class][name]
+            self.__class__._index_discard(index, old, self.id)
+            self.__class__._index_put(index, value, self.id)
+        if name in self.SORTED_ATTRIBUTES:
+            SORTED_INDEXES[s_class][name].remove(old, self.id)
+            SORTED_INDEXES[s_class][name].add(value, self.id)
+        columns = COLUMNS.get(s_class)
+        if name in self.COLUMN_ATTRIBUTES and columns is not None:
+            columns.set_value(self.id, name, value)
+
+    def _is_stored(self) -> bool:
+        """ True if this instance is the one held in DATA
+        """
+        objs = DATA.get(self.__class__.__name__, {})
+        # dict.get does not hydrate lazily loaded records
+        return dict.get(objs, getattr(self, 'id', None)) is self
+
     def __eq__(self, other: TypeVar('Base')) -> bool:
         """ Equality
         """
@@ -46,65 +159,403 @@ class Base():
 
     def to_json(self, for_serialization: bool = False) -> dict:
         """ Convert the object a JSON dictionary
+
+        The result is cached until the next attribute assignment.
         """
-        result = {}
-        for key, value in self.__dict__.items():
-            if not for_serialization and key[0] == '_':
-                continue
-            if type(value) is datetime:
-                result[key] = value.strftime(TIMESTAMP_FORMAT)
-            else:
-                result[key] = value
-        return result
+        cache = self._json_forms()
+        result = cache.get(for_serialization)
+        if result is None:
+            result = {}
+            for key, value in self._attributes():
+                if not for_serialization and key[0] == '_':
+                    continue
+                if type(value) is datetime:
+                    result[key] = value.strftime(TIMESTAMP_FORMAT)
+                else:
+                    result[key] = value
+            cache[for_serialization] = result
+        return dict(result)
+
+    def to_json_string(self) -> str:
+        """ Public JSON representation, encoded and cached
+        """
+        cache = self._json_forms()
+        encoded = cache.get('encoded')
+        if encoded is None:
+            encoded = json_dumps(self.to_json())
+            cache['encoded'] = encoded
+        return encoded
+
+    def _attributes(self) -> Iterable[tuple]:
+        """ (name, value) of the attributes of the object
+        """
+        return ((k, v) for k, v in self.__dict__.items() if k != JSON_CACHE)
+
+    def _drop_json_forms(self):
+        """ Forget the cached serialized forms
+        """
+        self.__dict__.pop(JSON_CACHE, None)
+
+    def _json_forms(self) -> dict:
+        """ Cache of serialized forms, reset by __setattr__
+        """
+        cache = self.__dict__.get(JSON_CACHE)
+        if cache is None:
+            cache = {}
+            self.__dict__[JSON_CACHE] = cache
+        return cache
 
     @classmethod
     def load_from_file(cls):
-        """ Load all objects from file
+        """ Load all objects from file, then replay the journal
+        """
+        if not cls.SHARED:
+            cls._load_files()
+            return
+        state = cls._shared_state()
+        with state.locked(exclusive=False):
+            cls._load_files()
+            state.mark_loaded()
+
+    @classmethod
+    def _load_files(cls):
+        """ Load the snapshot file, then replay the journal
         """
         s_class = cls.__name__
-        file_path = ".db_{}.json".format(s_class)
-        DATA[s_class] = {}
-        if not path.exists(file_path):
+        file_path = cls._file_path()
+        DATA[s_class] = LazyStore(cls._hydrate) if cls.LAZY_LOAD else {}
+        SNAPSHOTS.pop(s_class, None)
+        cls._reset_indexes()
+        if path.exists(file_path) and cls.SNAPSHOT_FORMAT == 'binary':
+            cls._load_snapshot(SnapshotReader(file_path))
+        elif path.exists(file_path):
+            with open(file_path, 'r') as f:
+                objs_json = json_loads(f.read())
+                for obj_id, obj_json in objs_json.items():
+                    cls._store_record(obj_json)
+
+        journal = cls._journal()
+        journal.pending = 0
+        for record in journal.replay():
+            if record.get('op') == 'save':
+                cls._unstore(record['id'])
+                cls._store(cls(**record['obj']))
+            elif record.get('op') == 'remove':
+                cls._unstore(record['id'])
+            journal.pending += 1
+
+    @classmethod
+    def _load_snapshot(cls, reader: SnapshotReader):
+        """ Load a binary snapshot: lazily, the store keeps the rows of
+        the mapped file and indexes are built from the snapshot index
+        """
+        s_class = cls.__name__
+        if not isinstance(DATA[s_class], LazyStore):
+            try:
+                for record in reader.records():
+                    cls._store(cls(**record))
+            finally:
+                reader.close()
             return
+        SNAPSHOTS[s_class] = reader
+        objs = LazyStore(lambda row: cls._hydrate(reader.record(row)),
+                         reader.record)
+        DATA[s_class] = objs
+        sorted_ids = SORTED_IDS[s_class]
+        for row, obj_id in enumerate(reader.ids):
+            objs.set_raw(obj_id, row)
+            sorted_ids.add(obj_id, obj_id)
+        for k, index in INDEXES[s_class].items():
+            for obj_id, value in zip(reader.ids, cls._column(reader, k)):
+                cls._index_put(index, value, obj_id)
+        for k, index in SORTED_INDEXES[s_class].items():
+            column = cls._column(reader, k)
+            if k in TIMESTAMP_ATTRIBUTES:
+                column = [v if v is None else parse_timestamp(v)
+                          for v in column]
+            for obj_id, value in zip(reader.ids, column):
+                index.add(value, obj_id)
+
+    @staticmethod
+    def _column(reader: SnapshotReader, attribute: str) -> list:
+        """ Values of an attribute for all rows of a snapshot, decoding
+        the records when the snapshot index does not keep them
+        """
+        column = reader.columns.get(attribute)
+        if column is None:
+            column = [reader.record(row).get(attribute)
+                      for row in range(len(reader))]
+        return column
 
-        with open(file_path, 'r') as f:
-            objs_json = json.load(f)
-            for obj_id, obj_json in objs_json.items():
-                DATA[s_class][obj_id] = cls(**obj_json)
+    @classmethod
+    def _snapshot_columns(cls) -> tuple:
+        """ Attributes kept in the index of binary snapshots
+        """
+        return tuple(dict.fromkeys(cls.INDEXED_ATTRIBUTES +
+                                   cls.SORTED_ATTRIBUTES))
 
     @classmethod
-    def save_to_file(cls):
+    def _file_path(cls) -> str:
+        """ Path of the snapshot file of the class
+        """
+        if cls.SNAPSHOT_FORMAT == 'binary':
+            return ".db_{}.snap".format(cls.__name__)
+        return ".db_{}.json".format(cls.__name__)
+
+    @classmethod
+    def save_to_file(cls, durable: bool = False):
         """ Save all objects to file
+
+        The snapshot supersedes the journal, which is emptied. With
+        durable, the snapshot is fsynced before it replaces the file.
+        """
+        if not cls.SHARED:
+            cls._compact(durable)
+            return
+        state = cls._shared_state()
+        with state.locked(exclusive=True):
+            cls._catch_up()
+            cls._compact(durable)
+            state.mark_loaded()
+
+    @classmethod
+    def _compact(cls, durable: bool = False):
+        """ Write the snapshot file and empty the journal
         """
         s_class = cls.__name__
-        file_path = ".db_{}.json".format(s_class)
+        file_path = cls._file_path()
+        journal = cls._journal()
+        with journal.compaction_lock:
+            journal.rotate()
+            objs = DATA[s_class]
+            tmp_path = "{}.{}.tmp".format(file_path, os.getpid())
+            with open(tmp_path, 'wb') as f:
+                if cls.SNAPSHOT_FORMAT == 'binary':
+                    write_snapshot(f, cls._snapshot_entries(objs),
+                                   cls._snapshot_columns())
+                else:
+                    f.write(json_dumps(cls._records(objs)).encode('utf-8'))
+                if durable:
+                    f.flush()
+                    os.fsync(f.fileno())
+            os.replace(tmp_path, file_path)
+            journal.discard_rotated()
+
+    @classmethod
+    def _records(cls, objs: dict) -> dict:
+        """ Serialized form of all objects of a store, by id
+        """
+        if isinstance(objs, LazyStore):
+            return objs.records(lambda obj: obj.to_json(True))
         objs_json = {}
-        for obj_id, obj in DATA[s_class].items():
-            objs_json[obj_id] = obj.to_json(True)
+        for obj in list(objs.values()):
+            objs_json[obj.id] = obj.to_json(True)
+        return objs_json
+
+    @classmethod
+    def _snapshot_entries(cls, objs: dict) -> Iterable[tuple]:
+        """ (id, payload, indexed values) of all objects of a store, for
+        write_snapshot; rows of the loaded snapshot are copied as is
+        """
+        reader = SNAPSHOTS.get(cls.__name__)
+        if isinstance(objs, LazyStore):
+            entries = objs.entries()
+        else:
+            entries = ((i, obj, False) for i, obj in list(objs.items()))
+        for obj_id, value, raw in entries:
+            if not raw:
+                record = value.to_json(True)
+                yield obj_id, encode_record(record), record
+            elif type(value) is int:
+                yield (obj_id, reader.payload(value),
+                       reader.values(value, cls._snapshot_columns()))
+            else:
+                yield obj_id, encode_record(value), value
+
+    @classmethod
+    def persist_changes(cls, changes: List[tuple], durable: bool = False):
+        """ Write a batch of ('save', obj) / ('remove', obj) changes,
+        already applied in memory, to storage in one go
+        """
+        if not cls.JOURNAL and not cls.SHARED:
+            cls.save_to_file(durable)
+            return
+        records = []
+        for op, obj in changes:
+            if op == 'save':
+                records.append({'op': op, 'id': obj.id,
+                                'obj': obj.to_json(True)})
+            else:
+                records.append({'op': op, 'id': obj.id})
+        if not cls.SHARED:
+            cls._append_to_journal(records, durable)
+            return
+        state = cls._shared_state()
+        with state.locked(exclusive=True):
+            if cls._catch_up():
+                # the changes of other processes came first
+                for op, obj in changes:
+                    if op == 'save':
+                        cls._store(obj)
+                    else:
+                        cls._unstore(obj.id)
+            cls._append_to_journal(records, durable)
+            state.mark_loaded()
+
+    @classmethod
+    def _shared_state(cls) -> SharedState:
+        """ Lock and change tracking of the files of the class
+        """
+        s_class = cls.__name__
+        if SHARED_STATES.get(s_class) is None:
+            SHARED_STATES[s_class] = SharedState(
+                ".db_{}.lock".format(s_class), cls._file_path(),
+                cls._journal().file_path)
+        return SHARED_STATES[s_class]
+
+    @classmethod
+    def _sync(cls):
+        """ In shared mode, apply the changes of other processes
+        """
+        if not cls.SHARED:
+            return
+        state = cls._shared_state()
+        if state.changed():
+            with state.locked(exclusive=False):
+                cls._catch_up()
+
+    @classmethod
+    def _catch_up(cls) -> bool:
+        """ Apply the changes other processes made to the files, the lock
+        being held: reload them after a compaction, else apply the new
+        journal records. True if anything changed
+        """
+        state = cls._shared_state()
+        if state.needs_reload():
+            cls._load_files()
+            state.mark_loaded()
+            return True
+        records = state.read_new_records()
+        s_class = cls.__name__
+        if DATA.get(s_class) is None:
+            DATA[s_class] = {}
+            cls._reset_indexes()
+        for record in records:
+            stored = DATA[s_class].get(record['id'])
+            cls._unstore(record['id'])
+            if record.get('op') == 'save':
+                obj = cls(**record['obj'])
+                cls._store(obj)
+                obj._notify('save')
+            elif stored is not None:
+                stored._notify('remove')
+        cls._journal().pending += len(records)
+        return len(records) > 0
+
+    @classmethod
+    def _journal(cls) -> Journal:
+        """ Journal of the class
+        """
+        s_class = cls.__name__
+        if JOURNALS.get(s_class) is None:
+            JOURNALS[s_class] = Journal(".db_{}.journal".format(s_class))
+        return JOURNALS[s_class]
+
+    @classmethod
+    def _append_to_journal(cls, records: List[dict], durable: bool = False):
+        """ Persist records in the journal, compacting in the background
+        every JOURNAL_COMPACT_EVERY records
+        """
+        journal = cls._journal()
+        journal.append(records, durable)
+        if journal.schedule_compaction(cls.JOURNAL_COMPACT_EVERY):
+            threading.Thread(target=cls.save_to_file, daemon=True).start()
+
+    @classmethod
+    def _store(cls, obj: TypeVar('Base')):
+        """ Put an object in DATA, replacing any object with the same id
+        """
+        s_class = cls.__name__
+        stored = DATA[s_class].get(obj.id)
+        if stored is not None:
+            cls._index_remove(stored)
+        DATA[s_class][obj.id] = obj
+        cls._index_add(obj)
+
+    @classmethod
+    def _store_record(cls, record: dict):
+        """ Put a serialized object in DATA, raw when loading lazily
+        """
+        objs = DATA[cls.__name__]
+        if not isinstance(objs, LazyStore):
+            cls._store(cls(**record))
+            return
+        objs.set_raw(record['id'], record)
+        for k, index in INDEXES[cls.__name__].items():
+            cls._index_put(index, record.get(k), record['id'])
+        SORTED_IDS[cls.__name__].add(record['id'], record['id'])
+        if cls.SORTED_ATTRIBUTES:
+            values = cls._raw_values(record, cls.SORTED_ATTRIBUTES)
+            for k, index in SORTED_INDEXES[cls.__name__].items():
+                index.add(values[k], record['id'])
+
+    @classmethod
+    def _hydrate(cls, record: dict) -> TypeVar('Base'):
+        """ Build the object of a lazily loaded record
+        """
+        return cls(**record)
 
-        with open(file_path, 'w') as f:
-            json.dump(objs_json, f)
+    @classmethod
+    def _unstore(cls, obj_id: str) -> bool:
+        """ Drop an object from DATA, False if it was not there
+        """
+        stored = DATA[cls.__name__].pop(obj_id, None)
+        if stored is None:
+            return False
+        cls._index_remove(stored)
+        return True
 
-    def save(self):
+    def save(self, persist: bool = True):
         """ Save current object
+
+        With persist False, only the in-memory store is updated and the
+        caller is expected to pass the change to persist_changes().
         """
-        s_class = self.__class__.__name__
         self.updated_at = datetime.utcnow()
-        DATA[s_class][self.id] = self
-        self.__class__.save_to_file()
+        self.__class__._store(self)
+        if persist:
+            self.__class__.persist_changes([('save', self)])
+        self._notify('save')
 
-    def remove(self):
+    def remove(self, persist: bool = True):
         """ Remove object
+
+        With persist False, only the in-memory store is updated and the
+        caller is expected to pass the change to persist_changes().
         """
-        s_class = self.__class__.__name__
-        if DATA[s_class].get(self.id) is not None:
-            del DATA[s_class][self.id]
-            self.__class__.save_to_file()
+        if not self.__class__._unstore(self.id):
+            return
+        if persist:
+            self.__class__.persist_changes([('remove', self)])
+        self._notify('remove')
+
+    @classmethod
+    def subscribe(cls, callback: Callable[[str, TypeVar('Base')], None]):
+        """ Call callback(event, obj) after each save/remove of the class
+        """
+        LISTENERS.setdefault(cls.__name__, []).append(callback)
+
+    def _notify(self, event: str):
+        """ Run the callbacks subscribed to the class
+        """
+        for callback in LISTENERS.get(self.__class__.__name__, ()):
+            callback(event, self)
 
     @classmethod
     def count(cls) -> int:
         """ Count all objects
         """
+        cls._sync()
         s_class = cls.__name__
         return len(DATA[s_class].keys())
 
@@ -118,6 +569,7 @@ class Base():
     def get(cls, id: str) -> TypeVar('Base'):
         """ Return one object by ID
         """
+        cls._sync()
         s_class = cls.__name__
         return DATA[s_class].get(id)
 
@@ -125,13 +577,284 @@ class Base():
     def search(cls, attributes: dict = {}) -> List[TypeVar('Base')]:
         """ Search all objects with matching attributes
         """
+        cls._sync()
         s_class = cls.__name__
         def _search(obj):
-            if len(attributes) == 0:
-                return True
-            for k, v in attributes.items():
-                if (getattr(obj, k) != v):
+            return cls._matches(obj, attributes)
+
+        objs = DATA[s_class]
+        candidates = cls._index_candidates(attributes)
+        if candidates is None:
+            return list(filter(_search, objs.values()))
+        return list(filter(_search, (objs[i] for i in candidates)))
+
+    @classmethod
+    def page(cls, limit: int, after: str = None,
+             attributes: dict = {}) -> List[TypeVar('Base')]:
+        """ Up to `limit` objects with matching attributes, in id order,
+        starting after the id `after`
+        """
+        cls._sync()
+        s_class = cls.__name__
+        objs = DATA[s_class]
+        if cls._index_candidates(attributes) is not None:
+            # few candidates: search through the hash indexes, then sort
+            found = sorted(cls.search(attributes), key=lambda o: o.id)
+            if after is not None:
+                found = [obj for obj in found if obj.id > after]
+            return found[:limit]
+        ids = SORTED_IDS[s_class].iter_ids(after)
+        matching = (objs[i] for i in ids
+                    if cls._matches(objs[i], attributes))
+        return list(islice(matching, limit))
+
+    @classmethod
+    def query(cls, attributes: dict = {}, ranges: dict = {},
+              prefixes: dict = {}) -> List[TypeVar('Base')]:
+        """ Objects with matching attributes, with low <= attribute < high
+        for each (low, high) of ranges (None bounds are open) and string
+        attributes starting with each of prefixes
+
+        Candidates come from the first index that applies: hash indexes,
+        the most selective sorted index, then the ColumnStore when
+        COLUMNAR is set; every condition is then checked on them.
+        """
+        cls._sync()
+        objs = DATA[cls.__name__]
+        candidates = cls._index_candidates(attributes)
+        if candidates is None:
+            candidates = cls._sorted_candidates(ranges, prefixes)
+        if candidates is None:
+            candidates = cls._column_candidates(attributes, ranges)
+        if candidates is None:
+            found = objs.values()
+        else:
+            found = (objs[i] for i in list(candidates))
+        return [obj for obj in found
+                if cls._matches(obj, attributes)
+                and cls._in_ranges(obj, ranges)
+                and cls._has_prefixes(obj, prefixes)]
+
+    @classmethod
+    def _sorted_candidates(cls, ranges: dict,
+                           prefixes: dict) -> Iterable[str]:
+        """ Ids of the narrowest range of sorted index matching one of the
+        conditions, None if no sorted index applies or, the ColumnStore
+        being available and holding every range and prefix attribute,
+        if the range holds over a thousandth of the objects (masks are
+        then cheaper than checking candidates)
+        """
+        indexes = SORTED_INDEXES.get(cls.__name__, {})
+        # an index only holds values of its type, bounds of another type
+        # may match objects left out of it
+        bounds = []
+        for k, (low, high) in ranges.items():
+            if k in indexes and all(bound is None or indexes[k].accepts(bound)
+                                    for bound in (low, high)):
+                bounds.append((k, low, high))
+        bounds += [(k,) + prefix_range(prefix)
+                   for k, prefix in prefixes.items()
+                   if k in indexes and indexes[k].accepts(prefix)]
+        best = None
+        for k, low, high in bounds:
+            count = indexes[k].count(low, high)
+            if best is None or count < best[0]:
+                best = (count, k, low, high)
+        if best is None:
+            return None
+        count, k, low, high = best
+        if count > len(DATA[cls.__name__]) // 1000 \
+                and cls._columns_cover(ranges, prefixes):
+            return None
+        return indexes[k].iter_range(low, high)
+
+    @classmethod
+    def _columns_cover(cls, ranges: dict, prefixes: dict) -> bool:
+        """ True if the ColumnStore can evaluate all the range conditions;
+        it has no prefix search
+        """
+        columns = cls._column_store()
+        return columns is not None and not prefixes \
+            and all(k in columns for k in ranges)
+
+    @classmethod
+    def _column_candidates(cls, attributes: dict,
+                           ranges: dict) -> Iterable[str]:
+        """ Ids matching the conditions on COLUMN_ATTRIBUTES, evaluated on
+        the ColumnStore; None without ColumnStore or such conditions
+        """
+        columns = cls._column_store()
+        if columns is None:
+            return None
+        attributes = {k: v for k, v in attributes.items() if k in columns}
+        ranges = {k: v for k, v in ranges.items() if k in columns}
+        if not attributes and not ranges:
+            return None
+        return columns.select(attributes, ranges)
+
+    @staticmethod
+    def _matches(obj: TypeVar('Base'), attributes: dict) -> bool:
+        """ True if obj has all the attribute values
+        """
+        for k, v in attributes.items():
+            if (getattr(obj, k) != v):
+                return False
+        return True
+
+    @staticmethod
+    def _in_ranges(obj: TypeVar('Base'), ranges: dict) -> bool:
+        """ True if low <= attribute < high for each (low, high) of ranges
+        """
+        for k, (low, high) in ranges.items():
+            value = getattr(obj, k, None)
+            try:
+                if value is None or (low is not None and value < low) \
+                        or (high is not None and not value < high):
                     return False
-            return True
-        
-        return list(filter(_search, DATA[s_class].values()))
+            except TypeError:
+                return False
+        return True
+
+    @staticmethod
+    def _has_prefixes(obj: TypeVar('Base'), prefixes: dict) -> bool:
+        """ True if each attribute is a string starting with its prefix
+        """
+        for k, prefix in prefixes.items():
+            value = getattr(obj, k, None)
+            if type(value) is not str or not value.startswith(prefix):
+                return False
+        return True
+
+    @classmethod
+    def _column_store(cls) -> ColumnStore:
+        """ ColumnStore of the class, built on first use; None when
+        COLUMNAR is off or numpy is missing
+        """
+        if not cls.COLUMNAR or not cls.COLUMN_ATTRIBUTES \
+                or not ColumnStore.available():
+            return None
+        s_class = cls.__name__
+        columns = COLUMNS.get(s_class)
+        if columns is not None:
+            return columns
+        columns = ColumnStore(cls.COLUMN_ATTRIBUTES, TIMESTAMP_ATTRIBUTES)
+        objs = DATA[s_class]
+        if isinstance(objs, LazyStore):
+            entries = objs.entries()
+        else:
+            entries = ((i, obj, False) for i, obj in list(objs.items()))
+        for obj_id, value, raw in entries:
+            if raw:
+                columns.set(obj_id,
+                            cls._raw_values(value, cls.COLUMN_ATTRIBUTES))
+            else:
+                columns.set(obj_id, cls._column_values(value))
+        COLUMNS[s_class] = columns
+        return columns
+
+    @classmethod
+    def _column_values(cls, obj: TypeVar('Base')) -> dict:
+        """ Values of the COLUMN_ATTRIBUTES of an object
+        """
+        return {k: getattr(obj, k, None) for k in cls.COLUMN_ATTRIBUTES}
+
+    @classmethod
+    def _raw_values(cls, raw, attributes: Iterable[str]) -> dict:
+        """ Values of attributes of a lazily loaded record, which is a
+        row of the loaded snapshot or a serialized object
+        """
+        if type(raw) is int:
+            values = SNAPSHOTS[cls.__name__].values(raw, attributes)
+        else:
+            values = {k: raw.get(k) for k in attributes}
+        for k in TIMESTAMP_ATTRIBUTES:
+            if values.get(k) is not None:
+                values[k] = parse_timestamp(values[k])
+        return values
+
+    @classmethod
+    def _reset_indexes(cls):
+        """ Drop and recreate the secondary indexes of the class
+        """
+        INDEXES[cls.__name__] = {k: {} for k in cls.INDEXED_ATTRIBUTES}
+        SORTED_IDS[cls.__name__] = SortedIndex()
+        SORTED_INDEXES[cls.__name__] = {
+            k: SortedIndex(cls._sorted_key_type(k))
+            for k in cls.SORTED_ATTRIBUTES}
+        COLUMNS.pop(cls.__name__, None)
+
+    @classmethod
+    def _sorted_key_type(cls, attribute: str) -> type:
+        """ Type of the values kept in the sorted index of an attribute;
+        objects with values of other types are left out of the index
+        """
+        return datetime if attribute in TIMESTAMP_ATTRIBUTES else str
+
+    @classmethod
+    def _index_add(cls, obj: TypeVar('Base')):
+        """ Add an object to all secondary indexes
+        """
+        for k, index in INDEXES[cls.__name__].items():
+            cls._index_put(index, getattr(obj, k, None), obj.id)
+        SORTED_IDS[cls.__name__].add(obj.id, obj.id)
+        for k, index in SORTED_INDEXES[cls.__name__].items():
+            index.add(getattr(obj, k, None), obj.id)
+        columns = COLUMNS.get(cls.__name__)
+        if columns is not None:
+            columns.set(obj.id, cls._column_values(obj))
+
+    @classmethod
+    def _index_remove(cls, obj: TypeVar('Base')):
+        """ Remove an object from all secondary indexes
+        """
+        for k, index in INDEXES[cls.__name__].items():
+            cls._index_discard(index, getattr(obj, k, None), obj.id)
+        SORTED_IDS[cls.__name__].remove(obj.id, obj.id)
+        for k, index in SORTED_INDEXES[cls.__name__].items():
+            index.remove(getattr(obj, k, None), obj.id)
+        columns = COLUMNS.get(cls.__name__)
+        if columns is not None:
+            columns.remove(obj.id)
+
+    @staticmethod
+    def _index_put(index: dict, value, obj_id: str):
+        """ Add one id to an index bucket; unhashable values (lists sent
+        as JSON, say) are not indexed, searches for them scan instead
+        """
+        try:
+            index.setdefault(value, set()).add(obj_id)
+        except TypeError:
+            pass
+
+    @staticmethod
+    def _index_discard(index: dict, value, obj_id: str):
+        """ Remove one id from an index bucket, dropping empty buckets
+        """
+        try:
+            ids = index.get(value)
+        except TypeError:
+            return
+        if ids is None:
+            return
+        ids.discard(obj_id)
+        if len(ids) == 0:
+            del index[value]
+
+    @classmethod
+    def _index_candidates(cls, attributes: dict) -> Iterable[str]:
+        """ Ids matching the indexed part of a search, None if no index
+        applies to the given attributes
+        """
+        indexes = INDEXES.get(cls.__name__, {})
+        candidates = None
+        for k, v in attributes.items():
+            if k not in indexes:
+                continue
+            try:
+                ids = indexes[k].get(v, set())
+            except TypeError:
+                continue
+            candidates = ids if candidates is None else candidates & ids
+            if len(candidates) == 0:
+                break
+        return candidates
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+""" Column store module
+"""
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Tuple
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+EPOCH = datetime(1970, 1, 1)
+SECOND = timedelta(seconds=1)
+# Code of the values that cannot be encoded: None or non-datetime
+# timestamps, unhashable values of other attributes. Selects keep these
+# rows as candidates and leave the exact check to the caller.
+OTHER = -1
+
+
+class ColumnStore():
+    """ Columnar mirror of the attributes of a model's objects
+
+    Each object owns a row of NumPy arrays: timestamp attributes hold
+    epoch seconds, other attributes are dictionary-encoded (one integer
+    code per distinct value). Searches combine one boolean mask per
+    condition instead of testing objects one by one. Rows of removed
+    objects are recycled.
+    """
+
+    def __init__(self, attributes: Iterable[str],
+                 timestamps: Iterable[str] = ()):
+        """ Initialize an empty store over attributes
+        """
+        if numpy is None:
+            raise RuntimeError("ColumnStore requires numpy")
+        self._timestamps = set(timestamps)
+        self._rows = {}
+        self._ids = []
+        self._free = []
+        self._live = numpy.zeros(0, dtype=bool)
+        self._columns = {}
+        self._codes = {}
+        self._values = {}
+        for k in attributes:
+            if k in self._timestamps:
+                self._columns[k] = numpy.zeros(0, dtype=numpy.int64)
+            else:
+                self._columns[k] = numpy.zeros(0, dtype=numpy.int32)
+                self._codes[k] = {}
+                self._values[k] = []
+
+    @staticmethod
+    def available() -> bool:
+        """ True if numpy is installed
+        """
+        return numpy is not None
+
+    def __len__(self) -> int:
+        """ Number of objects
+        """
+        return len(self._rows)
+
+    def __contains__(self, attribute: str) -> bool:
+        """ True if the attribute has a column
+        """
+        return attribute in self._columns
+
+    def _encode(self, attribute: str, value) -> int:
+        """ Integer stored for a value, adding it to the dictionary
+        """
+        if attribute in self._timestamps:
+            if not isinstance(value, datetime):
+                return OTHER
+            return (value - EPOCH) // SECOND
+        codes = self._codes[attribute]
+        try:
+            code = codes.get(value)
+        except TypeError:
+            return OTHER
+        if code is None:
+            code = len(codes)
+            codes[value] = code
+            self._values[attribute].append(value)
+        return code
+
+    def _grow(self):
+        """ Double the capacity of the arrays
+        """
+        size = max(1024, 2 * len(self._live))
+        self._live = numpy.resize(self._live, size)
+        self._live[len(self._ids):] = False
+        for k, column in self._columns.items():
+            self._columns[k] = numpy.resize(column, size)
+
+    def set(self, obj_id: str, values: Dict[str, object]):
+        """ Store the attribute values of an object
+        """
+        row = self._rows.get(obj_id)
+        if row is None:
+            if self._free:
+                row = self._free.pop()
+                self._ids[row] = obj_id
+            else:
+                row = len(self._ids)
+                if row == len(self._live):
+                    self._grow()
+                self._ids.append(obj_id)
+            self._rows[obj_id] = row
+            self._live[row] = True
+        for k, column in self._columns.items():
+            column[row] = self._encode(k, values.get(k))
+
+    def set_value(self, obj_id: str, attribute: str, value):
+        """ Update one attribute of a stored object
+        """
+        row = self._rows.get(obj_id)
+        if row is not None and attribute in self._columns:
+            self._columns[attribute][row] = self._encode(attribute, value)
+
+    def remove(self, obj_id: str):
+        """ Drop an object, if stored
+        """
+        row = self._rows.pop(obj_id, None)
+        if row is not None:
+            self._live[row] = False
+            self._ids[row] = None
+            self._free.append(row)
+
+    def select(self, attributes: Dict[str, object] = {},
+               ranges: Dict[str, Tuple] = {}) -> List[str]:
+        """ Ids of the objects having all the attribute values, with
+        low <= value < high for each (low, high) of ranges, None bounds
+        being open; timestamps match to the second and values coded
+        OTHER are always kept, so results may include objects failing
+        the conditions
+        """
+        mask = self._live[:len(self._ids)].copy()
+        for k, v in attributes.items():
+            column = self._columns[k][:len(mask)]
+            if k in self._timestamps:
+                mask &= column == self._encode(k, v)
+                continue
+            try:
+                code = self._codes[k].get(v)
+            except TypeError:
+                code = OTHER
+            if code is None:
+                return []
+            mask &= column == code
+        for k, (low, high) in ranges.items():
+            column = self._columns[k][:len(mask)]
+            if k in self._timestamps:
+                if low is not None:
+                    mask &= column >= self._encode(k, low)
+                if high is not None:
+                    # seconds are floored: keep the second of high, the
+                    # caller checks the exact bound
+                    mask &= column <= self._encode(k, high)
+                mask &= column != OTHER
+            else:
+                codes = self._codes_between(k, low, high) + [OTHER]
+                mask &= numpy.isin(column, codes)
+        return [self._ids[row] for row in numpy.flatnonzero(mask)]
+
+    def _codes_between(self, attribute: str, low, high) -> List[int]:
+        """ Codes of the dictionary values within [low, high)
+        """
+        codes = []
+        for code, value in enumerate(self._values[attribute]):
+            try:
+                if value is None or (low is not None and value < low) \
+                        or (high is not None and not value < high):
+                    continue
+            except TypeError:
+                continue
+            codes.append(code)
+        return codes
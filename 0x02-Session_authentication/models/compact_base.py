@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+""" CompactBase module
+"""
+from datetime import datetime, timedelta
+from os import getenv
+from typing import Iterable
+from models.base import Base, JSON_CACHE
+
+
+# Models built on CompactBase instead of Base when MODEL_COMPACT=true
+COMPACT = getenv('MODEL_COMPACT', 'false').lower() == 'true'
+EPOCH = datetime(1970, 1, 1)
+SECOND = timedelta(seconds=1)
+# Slots holding timestamps as epoch seconds, by attribute name
+TIMESTAMPS = {'_created_at': 'created_at', '_updated_at': 'updated_at'}
+
+
+class CompactBase(Base):
+    """ Base storing attributes in __slots__ instead of a __dict__
+
+    Timestamps are kept as integer epoch seconds and exposed as naive UTC
+    datetimes. Subclasses must declare the __slots__ of their attributes.
+    """
+
+    __slots__ = ('id', '_created_at', '_updated_at', JSON_CACHE)
+
+    def __init_subclass__(cls, **kwargs):
+        """ Collect the attribute names of the class, in MRO order
+        """
+        super().__init_subclass__(**kwargs)
+        names = []
+        for klass in reversed(cls.__mro__):
+            for name in klass.__dict__.get('__slots__', ()):
+                if name != JSON_CACHE:
+                    names.append(TIMESTAMPS.get(name, name))
+        cls._ATTRIBUTES = tuple(names)
+
+    @property
+    def created_at(self) -> datetime:
+        """ Creation time
+        """
+        return EPOCH + timedelta(seconds=self._created_at)
+
+    @created_at.setter
+    def created_at(self, value: datetime):
+        """ Store the creation time as epoch seconds
+        """
+        self._created_at = (value - EPOCH) // SECOND
+
+    @property
+    def updated_at(self) -> datetime:
+        """ Last update time
+        """
+        return EPOCH + timedelta(seconds=self._updated_at)
+
+    @updated_at.setter
+    def updated_at(self, value: datetime):
+        """ Store the last update time as epoch seconds
+        """
+        self._updated_at = (value - EPOCH) // SECOND
+
+    def _attributes(self) -> Iterable[tuple]:
+        """ (name, value) of the attributes of the object
+        """
+        return ((k, getattr(self, k, None)) for k in self._ATTRIBUTES)
+
+    def _drop_json_forms(self):
+        """ Forget the cached serialized forms
+        """
+        object.__setattr__(self, JSON_CACHE, None)
+
+    def _json_forms(self) -> dict:
+        """ Cache of serialized forms, reset by __setattr__
+        """
+        cache = getattr(self, JSON_CACHE, None)
+        if cache is None:
+            cache = {}
+            object.__setattr__(self, JSON_CACHE, cache)
+        return cache
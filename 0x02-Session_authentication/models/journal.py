@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+""" Journal module
+"""
+from os import path
+from typing import Iterator, List
+import json
+import os
+import threading
+
+
+class Journal():
+    """ Append-only log of save/remove records of one model class
+
+    Records are JSON lines `{"op": "save", "id": ..., "obj": {...}}` or
+    `{"op": "remove", "id": ...}`. Compaction first rotates the journal
+    to a side file so new records keep being appended while the snapshot
+    is written; the side file is dropped once the snapshot is on disk.
+    """
+
+    def __init__(self, file_path: str):
+        """ Initialize a Journal for the given file
+        """
+        self.file_path = file_path
+        self.rotated_path = "{}.compacting".format(file_path)
+        self.pending = 0
+        self.scheduled = False
+        self.lock = threading.Lock()
+        self.compaction_lock = threading.Lock()
+
+    def append(self, records: List[dict], durable: bool = False):
+        """ Append records in one write, fsynced when durable
+        """
+        lines = "".join(json.dumps(r) + "\n" for r in records)
+        with self.lock:
+            with open(self.file_path, 'a') as f:
+                f.write(lines)
+                if durable:
+                    f.flush()
+                    os.fsync(f.fileno())
+            self.pending += len(records)
+
+    def schedule_compaction(self, every: int) -> bool:
+        """ True once per rotation when `every` records are pending
+        """
+        with self.lock:
+            if self.scheduled or self.pending < every:
+                return False
+            self.scheduled = True
+            return True
+
+    def replay(self) -> Iterator[dict]:
+        """ Yield all records, the rotated ones first
+        """
+        for file_path in (self.rotated_path, self.file_path):
+            if not path.exists(file_path):
+                continue
+            with open(file_path, 'r') as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        # torn last line of an interrupted append
+                        continue
+
+    def rotate(self):
+        """ Move current records aside before writing a snapshot
+        """
+        with self.lock:
+            self.pending = 0
+            self.scheduled = False
+            if not path.exists(self.file_path):
+                return
+            if path.exists(self.rotated_path):
+                # leftover of an interrupted compaction: keep its records
+                with open(self.file_path, 'r') as src, \
+                        open(self.rotated_path, 'a') as dst:
+                    dst.write(src.read())
+                os.remove(self.file_path)
+            else:
+                os.replace(self.file_path, self.rotated_path)
+
+    def discard_rotated(self):
+        """ Drop the rotated records once a snapshot covers them
+        """
+        if path.exists(self.rotated_path):
+            os.remove(self.rotated_path)
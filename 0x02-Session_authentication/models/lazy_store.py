@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+""" Lazy store module
+"""
+from typing import Callable, Dict, Iterator, List, Tuple
+
+
+class LazyStore(dict):
+    """ id -> object mapping whose values may still be raw records
+
+    Raw records (as read from the snapshot) are turned into objects by
+    `hydrate` the first time they are accessed, then replace the record.
+    Length, membership and key iteration never hydrate. When raw values
+    are references rather than records, `decode` turns them into records.
+    """
+
+    def __init__(self, hydrate: Callable[[object], object],
+                 decode: Callable[[object], dict] = None):
+        """ Initialize an empty store
+        """
+        super().__init__()
+        self._hydrate = hydrate
+        self._decode = decode
+        self._raw_ids = set()
+
+    def set_raw(self, obj_id: str, record):
+        """ Store a record to hydrate on first access
+        """
+        dict.__setitem__(self, obj_id, record)
+        self._raw_ids.add(obj_id)
+
+    def is_raw(self, obj_id: str) -> bool:
+        """ True if the value of obj_id was not hydrated yet
+        """
+        return obj_id in self._raw_ids
+
+    def __getitem__(self, obj_id: str):
+        """ Object of obj_id, hydrated if needed
+        """
+        value = dict.__getitem__(self, obj_id)
+        if obj_id in self._raw_ids:
+            value = self._hydrate(value)
+            dict.__setitem__(self, obj_id, value)
+            self._raw_ids.discard(obj_id)
+        return value
+
+    def __setitem__(self, obj_id: str, obj):
+        """ Store an object
+        """
+        dict.__setitem__(self, obj_id, obj)
+        self._raw_ids.discard(obj_id)
+
+    def __delitem__(self, obj_id: str):
+        """ Drop an object
+        """
+        dict.__delitem__(self, obj_id)
+        self._raw_ids.discard(obj_id)
+
+    def get(self, obj_id: str, default=None):
+        """ Object of obj_id or default
+        """
+        if obj_id not in self:
+            return default
+        return self[obj_id]
+
+    def pop(self, obj_id: str, *default):
+        """ Remove and return the (hydrated) object of obj_id
+        """
+        if obj_id not in self:
+            return dict.pop(self, obj_id, *default)
+        value = self[obj_id]
+        del self[obj_id]
+        return value
+
+    def values(self) -> List[object]:
+        """ All objects, hydrating the remaining records
+        """
+        return [self[obj_id] for obj_id in list(self.keys())]
+
+    def items(self) -> List[Tuple[str, object]]:
+        """ All (id, object) pairs, hydrating the remaining records
+        """
+        return [(obj_id, self[obj_id]) for obj_id in list(self.keys())]
+
+    def entries(self) -> Iterator[Tuple[str, object, bool]]:
+        """ (id, value, is raw) of every entry, without hydrating
+        """
+        for obj_id, value in list(dict.items(self)):
+            yield obj_id, value, obj_id in self._raw_ids
+
+    def records(self, serialize: Callable[[object], dict]) -> Dict[str, dict]:
+        """ Serialized form of every entry, raw records decoded
+        """
+        result = {}
+        for obj_id, value, raw in self.entries():
+            if not raw:
+                result[obj_id] = serialize(value)
+            elif self._decode is not None:
+                result[obj_id] = self._decode(value)
+            else:
+                result[obj_id] = value
+        return result
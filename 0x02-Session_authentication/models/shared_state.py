@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+""" Shared state module
+"""
+from contextlib import contextmanager
+from typing import Iterator, List, Tuple
+import json
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+# Stamp of a file never looked at, differs from any real stamp
+_UNSEEN = ('unseen',)
+
+
+def stamp(file_path: str) -> Tuple:
+    """ (inode, mtime, size) of a file, None if it does not exist
+    """
+    try:
+        st = os.stat(file_path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+class SharedState():
+    """ Lock and change tracking of the files of a model class shared by
+    several processes
+
+    Processes take an advisory lock on a lock file: shared to read the
+    files, exclusive to append to the journal or write the snapshot. Each
+    process remembers the stamp of the snapshot it loaded and how far it
+    read the journal: a new snapshot means a full reload, a longer
+    journal means only its new records have to be applied.
+    """
+
+    def __init__(self, lock_path: str, snapshot_path: str,
+                 journal_path: str):
+        """ Initialize the state of files not loaded yet
+        """
+        self.lock_path = lock_path
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path
+        self.snapshot_stamp = _UNSEEN
+        self.journal_inode = None
+        self.offset = 0
+        self._fd = None
+        self._pid = None
+        self._depth = 0
+        self._lock = threading.RLock()
+
+    def changed(self) -> bool:
+        """ True if another process wrote to the files since we read them
+        """
+        if stamp(self.snapshot_path) != self.snapshot_stamp:
+            return True
+        journal = stamp(self.journal_path)
+        if journal is None:
+            return self.offset > 0
+        return journal[0] != self.journal_inode or journal[2] != self.offset
+
+    def needs_reload(self) -> bool:
+        """ True if the files changed in a way only a full reload covers:
+        new snapshot, or journal replaced or truncated
+        """
+        if stamp(self.snapshot_path) != self.snapshot_stamp:
+            return True
+        journal = stamp(self.journal_path)
+        if journal is None:
+            return self.offset > 0
+        if self.journal_inode is not None \
+                and journal[0] != self.journal_inode:
+            return True
+        return journal[2] < self.offset
+
+    def mark_loaded(self):
+        """ Record the files as fully read
+        """
+        self.snapshot_stamp = stamp(self.snapshot_path)
+        journal = stamp(self.journal_path)
+        self.journal_inode = None if journal is None else journal[0]
+        self.offset = 0 if journal is None else journal[2]
+
+    def read_new_records(self) -> List[dict]:
+        """ Journal records appended since the last read
+        """
+        try:
+            with open(self.journal_path, 'rb') as f:
+                self.journal_inode = os.fstat(f.fileno()).st_ino
+                f.seek(self.offset)
+                data = f.read()
+        except FileNotFoundError:
+            return []
+        # a torn last line is left for the next read
+        end = data.rfind(b'\n') + 1
+        self.offset += end
+        records = []
+        for line in data[:end].splitlines():
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+        return records
+
+    @contextmanager
+    def locked(self, exclusive: bool) -> Iterator[None]:
+        """ Hold the lock, shared or exclusive, for the block; nested
+        blocks of the same thread keep the outer lock
+        """
+        if fcntl is None:
+            raise RuntimeError("shared model files require fcntl")
+        with self._lock:
+            if self._depth > 0:
+                self._depth += 1
+                try:
+                    yield
+                finally:
+                    self._depth -= 1
+                return
+            fd = self._lock_fd()
+            fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            self._depth = 1
+            try:
+                yield
+            finally:
+                self._depth = 0
+                fcntl.flock(fd, fcntl.LOCK_UN)
+
+    def _lock_fd(self) -> int:
+        """ Descriptor of the lock file, opened again in forked children
+        since a flock is shared by all copies of a descriptor
+        """
+        if self._fd is None or self._pid != os.getpid():
+            self._fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+            self._pid = os.getpid()
+        return self._fd
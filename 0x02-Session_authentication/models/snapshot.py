@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+""" Binary snapshot module
+
+Layout of a snapshot file, integers are little-endian:
+
+    header   magic "MSNAP001", record count (u64), index offset (u64)
+    records  for each record: payload length (u32), JSON payload
+    index    record offsets (count x u64), then the length (u32) of a
+             JSON object {"ids": [...], "columns": {attribute: [...]}}
+
+The index holds the id, offset and indexed attribute values of every
+record, so a memory-mapped reader only decodes the records it reads.
+
+Converters: python3 -m models.snapshot to-snapshot|to-json SRC DST [ATTR..]
+"""
+import json
+import mmap
+import struct
+import sys
+from array import array
+from typing import BinaryIO, Iterable, Iterator, List, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+MAGIC = b'MSNAP001'
+HEADER = struct.Struct('<8sQQ')
+LENGTH = struct.Struct('<I')
+
+
+def encode_record(record: dict) -> bytes:
+    """ JSON payload of a record
+    """
+    if orjson is not None:
+        return orjson.dumps(record)
+    return json.dumps(record).encode('utf-8')
+
+
+def decode_record(payload: bytes) -> dict:
+    """ Record of a JSON payload
+    """
+    if orjson is not None:
+        return orjson.loads(payload)
+    return json.loads(payload)
+
+
+def write_snapshot(f: BinaryIO, entries: Iterable[Tuple[str, bytes, dict]],
+                   columns: Iterable[str] = ()) -> int:
+    """ Write (id, payload, attribute values) entries to a seekable
+    binary file, keeping the values of `columns` in the index
+
+    Return the number of records written
+    """
+    f.write(HEADER.pack(MAGIC, 0, 0))
+    ids = []
+    offsets = array('Q')
+    values = {k: [] for k in columns}
+    offset = HEADER.size
+    for obj_id, payload, row in entries:
+        ids.append(obj_id)
+        offsets.append(offset)
+        f.write(LENGTH.pack(len(payload)))
+        f.write(payload)
+        offset += LENGTH.size + len(payload)
+        for k, column in values.items():
+            column.append(row.get(k))
+    if sys.byteorder == 'big':
+        offsets.byteswap()
+    f.write(offsets.tobytes())
+    meta = encode_record({'ids': ids, 'columns': values})
+    f.write(LENGTH.pack(len(meta)))
+    f.write(meta)
+    f.seek(0)
+    f.write(HEADER.pack(MAGIC, len(ids), offset))
+    f.seek(0, 2)
+    return len(ids)
+
+
+class SnapshotReader():
+    """ Memory-mapped snapshot file
+
+    Records are addressed by row, their position in the file; `row_of`
+    maps an id to its row.
+    """
+
+    def __init__(self, file_path: str):
+        """ Map the file and read its index
+        """
+        with open(file_path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count, index_offset = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self._map.close()
+            raise ValueError("{} is not a model snapshot".format(file_path))
+        end = index_offset + 8 * count
+        self.offsets = array('Q')
+        self.offsets.frombytes(self._map[index_offset:end])
+        if sys.byteorder == 'big':
+            self.offsets.byteswap()
+        length = LENGTH.unpack_from(self._map, end)[0]
+        start = end + LENGTH.size
+        meta = decode_record(self._map[start:start + length])
+        self.ids = meta['ids']
+        self.columns = meta['columns']
+        self._rows = None
+
+    def __len__(self) -> int:
+        """ Number of records
+        """
+        return len(self.ids)
+
+    def payload(self, row: int) -> bytes:
+        """ Encoded record of a row
+        """
+        offset = self.offsets[row]
+        length = LENGTH.unpack_from(self._map, offset)[0]
+        offset += LENGTH.size
+        return self._map[offset:offset + length]
+
+    def record(self, row: int) -> dict:
+        """ Decoded record of a row
+        """
+        return decode_record(self.payload(row))
+
+    def values(self, row: int, attributes: Iterable[str]) -> dict:
+        """ Attribute values of a row, decoding it only when an attribute
+        is not kept in the index
+        """
+        result = {}
+        record = None
+        for k in attributes:
+            column = self.columns.get(k)
+            if column is not None:
+                result[k] = column[row]
+                continue
+            if record is None:
+                record = self.record(row)
+            result[k] = record.get(k)
+        return result
+
+    def row_of(self, obj_id: str) -> int:
+        """ Row of an id, None if the snapshot does not hold it
+        """
+        if self._rows is None:
+            self._rows = {i: row for row, i in enumerate(self.ids)}
+        return self._rows.get(obj_id)
+
+    def get(self, obj_id: str) -> dict:
+        """ Decoded record of an id, None if the snapshot does not hold it
+        """
+        row = self.row_of(obj_id)
+        if row is None:
+            return None
+        return self.record(row)
+
+    def records(self) -> Iterator[dict]:
+        """ All decoded records, in file order
+        """
+        for row in range(len(self.ids)):
+            yield self.record(row)
+
+    def close(self):
+        """ Unmap the file
+        """
+        self._map.close()
+
+
+def json_to_snapshot(json_path: str, snapshot_path: str,
+                     columns: List[str] = ()) -> int:
+    """ Convert a .db_<Class>.json file to a snapshot file
+    """
+    with open(json_path, 'rb') as f:
+        objs_json = decode_record(f.read())
+    entries = ((obj_id, encode_record(record), record)
+               for obj_id, record in objs_json.items())
+    with open(snapshot_path, 'wb') as f:
+        return write_snapshot(f, entries, columns)
+
+
+def snapshot_to_json(snapshot_path: str, json_path: str) -> int:
+    """ Convert a snapshot file to a .db_<Class>.json file
+    """
+    reader = SnapshotReader(snapshot_path)
+    try:
+        objs_json = {}
+        for record in reader.records():
+            objs_json[record['id']] = record
+    finally:
+        reader.close()
+    with open(json_path, 'wb') as f:
+        f.write(encode_record(objs_json))
+    return len(objs_json)
+
+
+def main(argv: List[str]) -> int:
+    """ Command line converter
+    """
+    if len(argv) < 3 or argv[0] not in ('to-snapshot', 'to-json'):
+        print("Usage: python3 -m models.snapshot to-snapshot|to-json "
+              "SRC DST [ATTRIBUTE ...]")
+        return 2
+    if argv[0] == 'to-snapshot':
+        count = json_to_snapshot(argv[1], argv[2], argv[3:])
+    else:
+        count = snapshot_to_json(argv[1], argv[2])
+    print("{} records written to {}".format(count, argv[2]))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+""" Sorted index module
+"""
+from bisect import bisect_left, bisect_right, insort
+from typing import Iterator, Tuple
+
+# Sorts after any id, to bisect past all pairs of a key
+_MAX_ID = chr(0x10ffff)
+
+
+def prefix_range(prefix: str) -> Tuple[str, str]:
+    """ (low, high) bounds of the strings starting with prefix, high
+    being None when there is no upper bound
+    """
+    high = prefix
+    while high and high[-1] == _MAX_ID:
+        high = high[:-1]
+    if not high:
+        return prefix, None
+    return prefix, high[:-1] + chr(ord(high[-1]) + 1)
+
+
+class SortedIndex():
+    """ Sorted list of (key, id) pairs
+
+    Lookups bisect in O(log n). Added pairs are buffered and merged on
+    the next read: one at a time with insort when few are pending, with
+    a single sort after bulk loads. Only keys of key_type (any type when
+    None) are indexed: None and keys of other types would not compare
+    with the others.
+    """
+
+    def __init__(self, key_type: type = None):
+        """ Initialize an empty index of key_type keys
+        """
+        self.key_type = key_type
+        self._entries = []
+        self._pending = []
+
+    def __len__(self) -> int:
+        """ Number of indexed pairs
+        """
+        return len(self._entries) + len(self._pending)
+
+    def accepts(self, key) -> bool:
+        """ True if key is of the type of the indexed keys
+        """
+        return key is not None and (self.key_type is None
+                                    or isinstance(key, self.key_type))
+
+    def add(self, key, obj_id: str):
+        """ Index obj_id under key, if of the indexed type
+        """
+        if self.accepts(key):
+            self._pending.append((key, obj_id))
+
+    def _merge(self):
+        """ Move pending pairs into the sorted entries; pairs failing to
+        compare stay pending and the index is left consistent
+        """
+        if len(self._pending) < 32:
+            while self._pending:
+                # insort raises before inserting
+                insort(self._entries, self._pending[-1])
+                self._pending.pop()
+        else:
+            entries = self._entries + self._pending
+            entries.sort()
+            self._entries, self._pending = entries, []
+
+    def remove(self, key, obj_id: str):
+        """ Drop obj_id from key, if indexed
+        """
+        if not self.accepts(key):
+            return
+        if self._pending:
+            self._merge()
+        i = bisect_left(self._entries, (key, obj_id))
+        if i < len(self._entries) and self._entries[i] == (key, obj_id):
+            del self._entries[i]
+
+    def _bounds(self, low=None, high=None) -> Tuple[int, int]:
+        """ Positions of the first pair with low <= key and past the last
+        pair with key < high, None bounds being open
+        """
+        if self._pending:
+            self._merge()
+        start = 0 if low is None else bisect_left(self._entries, (low,))
+        end = len(self._entries)
+        if high is not None:
+            end = bisect_left(self._entries, (high,))
+        return start, max(start, end)
+
+    def count(self, low=None, high=None) -> int:
+        """ Number of pairs with low <= key < high
+        """
+        start, end = self._bounds(low, high)
+        return end - start
+
+    def iter_range(self, low=None, high=None) -> Iterator[str]:
+        """ Ids of the pairs with low <= key < high, in key order
+        """
+        start, end = self._bounds(low, high)
+        for i in range(start, end):
+            yield self._entries[i][1]
+
+    def iter_ids(self, after=None) -> Iterator[str]:
+        """ Ids in key order, starting past every pair keyed `after`
+        """
+        if self._pending:
+            self._merge()
+        start = 0
+        if after is not None:
+            start = bisect_right(self._entries, (after, _MAX_ID))
+        for i in range(start, len(self._entries)):
+            yield self._entries[i][1]
@@ -3,12 +3,23 @@
 """
 import hashlib
 from models.base import Base
+from models.compact_base import COMPACT, CompactBase
 
 
-class User(Base):
+class User(CompactBase if COMPACT else Base):
     """ User class
     """
 
+    if COMPACT:
+        __slots__ = ('email', '_password', 'first_name', 'last_name')
+
+    # every filter of GET /api/v1/users has a hash index, so a page never
+    # scans past the users matching it
+    INDEXED_ATTRIBUTES = ('email', 'first_name', 'last_name')
+    SORTED_ATTRIBUTES = ('email', 'created_at', 'updated_at')
+    COLUMN_ATTRIBUTES = ('first_name', 'last_name', 'created_at',
+                         'updated_at')
+
     def __init__(self, *args: list, **kwargs: dict):
         """ Initialize a User instance
         """
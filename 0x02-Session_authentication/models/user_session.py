@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+""" UserSession module
+"""
+from models.base import Base
+from models.compact_base import COMPACT, CompactBase
+
+
+class UserSession(CompactBase if COMPACT else Base):
+    """ UserSession class
+    """
+
+    if COMPACT:
+        __slots__ = ('user_id', 'session_id')
+
+    INDEXED_ATTRIBUTES = ('session_id', 'user_id')
+
+    def __init__(self, *args: list, **kwargs: dict):
+        """ Initialize a UserSession instance
+        """
+        super().__init__(*args, **kwargs)
+        self.user_id = kwargs.get('user_id')
+        self.session_id = kwargs.get('session_id')
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+""" Write buffer module
+"""
+from typing import TypeVar
+import atexit
+import threading
+
+
+class WriteBuffer():
+    """ Write-behind buffer of saves and removes of one model class
+
+    Changes are applied to the in-memory store right away and persisted
+    together by Base.persist_changes() once `max_pending` objects are
+    dirty or `max_delay` seconds after the first pending change. Several
+    changes of the same object coalesce into the last one.
+    """
+
+    def __init__(self, model: type, max_pending: int = 100,
+                 max_delay: float = 1.0):
+        """ Initialize a WriteBuffer for a model class
+        """
+        self.model = model
+        self.max_pending = max_pending
+        self.max_delay = max_delay
+        self._pending = {}
+        self._timer = None
+        self._lock = threading.RLock()
+        atexit.register(self.flush, True)
+
+    def save(self, obj: TypeVar('Base')):
+        """ Save an object, persisting it later
+        """
+        obj.save(persist=False)
+        self._add('save', obj)
+
+    def remove(self, obj: TypeVar('Base')):
+        """ Remove an object, persisting it later
+        """
+        obj.remove(persist=False)
+        self._add('remove', obj)
+
+    def flush(self, durable: bool = False):
+        """ Persist all pending changes in one batch, fsynced if durable
+        """
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            changes = list(self._pending.values())
+            self._pending = {}
+            if len(changes) > 0:
+                self.model.persist_changes(changes, durable)
+
+    def _add(self, op: str, obj: TypeVar('Base')):
+        """ Record a change and flush on the size or time threshold
+        """
+        with self._lock:
+            self._pending[obj.id] = (op, obj)
+            if len(self._pending) >= self.max_pending:
+                self.flush()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.max_delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
@@ -4,6 +4,7 @@ Flask app for handling authentication
 """
 from auth import Auth
 from flask import Flask, jsonify, request, abort, redirect, url_for
+from hash_pool import PoolSaturated
 from sqlalchemy.exc import InvalidRequestError
 
 app = Flask(__name__)
@@ -11,6 +12,24 @@ app = Flask(__name__)
 AUTH = Auth()
 
 
+@app.teardown_appcontext
+def remove_db_session(exception: Exception = None) -> None:
+    """Release the request's database session
+    """
+    AUTH.close_session()
+
+
+@app.errorhandler(PoolSaturated)
+def service_busy(error: PoolSaturated) -> str:
+    """Password hashing is saturated
+    Return:
+      - 503 asking the client to retry
+    """
+    response = jsonify({"message": "service busy, retry later"})
+    response.headers["Retry-After"] = "1"
+    return response, 503
+
+
 @app.route('/', methods=['GET'], strict_slashes=False)
 def hello() -> str:
     """GET /
@@ -7,6 +7,8 @@ import bcrypt
 import logging
 from typing import Union
 from db import DB
+from hash_pool import PoolSaturated, get_pool, get_rounds, hash_rounds
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm.exc import NoResultFound
 from user import User
 from uuid import uuid4
@@ -14,17 +16,18 @@ from uuid import uuid4
 logging.disable(logging.WARNING)
 
 
-def _hash_password(password: str) -> bytes:
+def _hash_password(password: str, rounds: int = None) -> bytes:
     """Hashes a password using bcrypt and returns the hashed password as bytes.
 
     Args:
         password (str): The password to hash.
+        rounds (int): The bcrypt cost factor, defaults to get_rounds().
 
     Returns:
         bytes: The salted, hashed password.
     """
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
+    salt = bcrypt.gensalt(rounds or get_rounds())
+    hashed = get_pool().hashpw(password.encode('utf-8'), salt)
     return hashed
 
 
@@ -42,9 +45,17 @@ class Auth:
     with the authentication database.
     """
     def __init__(self):
-        """Initializes a new Auth instance.
+        """Initializes a new Auth instance, settling the bcrypt cost
+        factor (calibrated if BCRYPT_TARGET_MS is set) before requests.
         """
         self._db = DB()
+        get_rounds()
+
+    def close_session(self) -> None:
+        """Releases the current thread's database session, returning its
+        connection to the pool.
+        """
+        self._db.remove_session()
 
     def register_user(self, email: str, password: str) -> User:
         """Registers a new user and returns the User object.
@@ -56,16 +67,20 @@ class Auth:
         Returns:
             User: The User object created.
         """
+        hashed_password = _hash_password(password)
         try:
-            self._db.find_user_by(email=email)
-            raise ValueError(f"User {email} already exists")
-        except NoResultFound:
-            hashed_password = _hash_password(password)
             return self._db.add_user(email, hashed_password)
+        except IntegrityError:
+            raise ValueError(f"User {email} already exists")
 
     def valid_login(self, email: str, password: str) -> bool:
         """Validates a login attempt.
 
+        A correct password stored with a lower cost factor than the
+        current one is hashed again at the current cost; stronger
+        hashes are kept. The rehash is skipped, and retried on a later
+        login, when the pool is busy.
+
         Args:
             email (str): The email of the user.
             password (str): The unhashed password of the user.
@@ -75,10 +90,24 @@ class Auth:
         """
         try:
             user = self._db.find_user_by(email=email)
-            return bcrypt.checkpw(password.encode('utf-8'),
-                                  user.hashed_password)
         except NoResultFound:
             return False
+        pool = get_pool()
+        if not pool.checkpw(password.encode('utf-8'), user.hashed_password):
+            return False
+        rounds = get_rounds()
+        stored_rounds = hash_rounds(user.hashed_password)
+        rehashed = False
+        if stored_rounds < rounds:
+            try:
+                hashed_password = _hash_password(password, rounds)
+                self._db.update_user(user.id,
+                                     hashed_password=hashed_password)
+                rehashed = True
+            except PoolSaturated:
+                pass
+        pool.record_cost(stored_rounds, rehashed)
+        return True
 
     def create_session(self, email: str) -> str:
         """Creates a new session for the user.
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Benchmark of DB.find_user_by latency with and without the users indexes.
+
+Usage: ./bench_lookup.py [rows]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from sqlalchemy import text
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ["DB_URL"] = "sqlite:///{}".format(DB_PATH)
+
+from db import DB  # noqa: E402
+from user import User  # noqa: E402
+
+LOOKUPS = 200
+
+
+def populate(db: DB, rows: int) -> None:
+    """Inserts rows users in batches"""
+    batch = 50000
+    with db._engine.begin() as conn:
+        for start in range(0, rows, batch):
+            conn.execute(User.__table__.insert(), [
+                {"email": "user{}@example.com".format(i),
+                 "hashed_password": "x",
+                 "session_id": "session-{}".format(i),
+                 "reset_token": "token-{}".format(i)}
+                for i in range(start, min(start + batch, rows))])
+
+
+def measure(db: DB, rows: int, label: str) -> None:
+    """Prints the mean lookup latency per indexed column"""
+    for column, fmt in (("email", "user{}@example.com"),
+                        ("session_id", "session-{}"),
+                        ("reset_token", "token-{}")):
+        keys = [fmt.format(random.randrange(rows)) for _ in range(LOOKUPS)]
+        start = time.perf_counter()
+        for key in keys:
+            db.find_user_by(**{column: key})
+        elapsed = (time.perf_counter() - start) / LOOKUPS
+        print("{:<10} {:<12} {:>10.3f} ms".format(label, column,
+                                                  elapsed * 1000))
+        db.remove_session()
+
+
+def main() -> None:
+    """Runs the lookups against indexed, then unindexed columns"""
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    db = DB()
+    populate(db, rows)
+    print("{:,} rows".format(rows))
+    measure(db, rows, "indexed")
+    with db._engine.begin() as conn:
+        for index in User.__table__.indexes:
+            conn.execute(text("DROP INDEX {}".format(index.name)))
+    measure(db, rows, "scan")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,64 @@
 #!/usr/bin/env python3
 """DB module for SQLAlchemy"""
 
-from sqlalchemy import create_engine
+import os
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy.pool import QueuePool
 from sqlalchemy.orm.session import Session
 from sqlalchemy.orm.exc import NoResultFound
-from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.exc import IntegrityError, InvalidRequestError
 
 from user import Base, User
 
 
+def _sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    """Enable WAL so readers do not block on the writer
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
+
+
+def _create_engine() -> Engine:
+    """Create the engine from the environment
+
+    DB_URL (default sqlite:///a.db), DB_POOL_SIZE, DB_MAX_OVERFLOW,
+    DB_POOL_PRE_PING and DB_SQLITE_WAL tune the connection pool.
+    """
+    url = os.getenv("DB_URL", "sqlite:///a.db")
+    options = {
+        "echo": False,
+        "pool_size": int(os.getenv("DB_POOL_SIZE", 5)),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", 10)),
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "true") == "true",
+    }
+    is_sqlite = url.startswith("sqlite")
+    if is_sqlite:
+        # connections move between request threads through the pool
+        options["connect_args"] = {"check_same_thread": False}
+        options["poolclass"] = QueuePool
+    engine = create_engine(url, **options)
+    if is_sqlite and os.getenv("DB_SQLITE_WAL", "true") == "true":
+        event.listen(engine, "connect", _sqlite_pragmas)
+    return engine
+
+
+def migrate(engine: Engine) -> None:
+    """Bring an existing database up to the current schema
+
+    Creates missing tables, then the indexes of tables created before
+    they were declared. Fails with IntegrityError if duplicate emails
+    prevent the unique index on users.email.
+    """
+    Base.metadata.create_all(engine)
+    for index in User.__table__.indexes:
+        index.create(engine, checkfirst=True)
+
+
 class DB:
     """DB class
     """
@@ -18,26 +66,34 @@ class DB:
     def __init__(self) -> None:
         """Initialize a new DB instance
         """
-        self._engine = create_engine("sqlite:///a.db", echo=False)
-        Base.metadata.drop_all(self._engine)
-        Base.metadata.create_all(self._engine)
-        self.__session = None
+        self._engine = _create_engine()
+        if os.getenv("DB_RESET", "true") == "true":
+            Base.metadata.drop_all(self._engine)
+        migrate(self._engine)
+        self.__session = scoped_session(sessionmaker(bind=self._engine))
 
     @property
     def _session(self) -> Session:
-        """Memoized session object
+        """Session object of the current thread
         """
-        if self.__session is None:
-            DBSession = sessionmaker(bind=self._engine)
-            self.__session = DBSession()
-        return self.__session
+        return self.__session()
+
+    def remove_session(self) -> None:
+        """Close the current thread's session, returning its connection
+        to the pool
+        """
+        self.__session.remove()
 
     def add_user(self, email: str, hashed_password: str) -> User:
         """Save a new user to the database
         """
         user = User(email=email, hashed_password=hashed_password)
         self._session.add(user)
-        self._session.commit()
+        try:
+            self._session.commit()
+        except IntegrityError:
+            self._session.rollback()
+            raise
         return user
 
     def find_user_by(self, **kwargs) -> User:
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Hash pool module running bcrypt work off the request threads.
+"""
+
+import os
+import threading
+import time
+import bcrypt
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Dict
+
+
+# Cost factor bcrypt.gensalt uses by default
+DEFAULT_ROUNDS = 12
+# Cost factors bcrypt accepts
+MIN_ROUNDS, MAX_ROUNDS = 4, 31
+
+
+class PoolSaturated(Exception):
+    """Raised when the hash pool has no room for more work."""
+
+
+def _hashpw(password: bytes, salt: bytes) -> bytes:
+    """Hashes a password, runs inside a pool worker."""
+    return bcrypt.hashpw(password, salt)
+
+
+def _checkpw(password: bytes, hashed_password: bytes) -> bool:
+    """Checks a password against a hash, runs inside a pool worker."""
+    return bcrypt.checkpw(password, hashed_password)
+
+
+class HashPool:
+    """Bounded executor for bcrypt hashing and verification.
+
+    At most `workers + queue_size` calls are admitted at once; callers
+    beyond that wait up to `wait` seconds for a slot, then get
+    PoolSaturated so the API can answer 503 instead of piling up.
+    """
+
+    def __init__(self, kind: str = "thread", workers: int = None,
+                 queue_size: int = None, wait: float = 0) -> None:
+        """Initializes a new HashPool.
+
+        Args:
+            kind (str): "thread" or "process" workers.
+            workers (int): Number of workers, defaults to the CPU count.
+            queue_size (int): Calls allowed to wait for a worker,
+                defaults to 4 per worker.
+            wait (float): Seconds to wait for a slot before giving up.
+        """
+        workers = workers or os.cpu_count() or 1
+        if queue_size is None:
+            queue_size = 4 * workers
+        if kind == "process":
+            self._executor = ProcessPoolExecutor(max_workers=workers)
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=workers)
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._wait = wait
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def hashpw(self, password: bytes, salt: bytes) -> bytes:
+        """Hashes a password in the pool.
+
+        Args:
+            password (bytes): The password to hash.
+            salt (bytes): A bcrypt salt.
+
+        Returns:
+            bytes: The salted, hashed password.
+        """
+        return self._run("hashpw", _hashpw, password, salt)
+
+    def checkpw(self, password: bytes, hashed_password: bytes) -> bool:
+        """Checks a password against a hash in the pool.
+
+        Args:
+            password (bytes): The password to check.
+            hashed_password (bytes): The stored hash.
+
+        Returns:
+            bool: True if the password matches the hash.
+        """
+        return self._run("checkpw", _checkpw, password, hashed_password)
+
+    def record_cost(self, rounds: int, rehashed: bool) -> None:
+        """Counts the cost factor of a hash checked at login.
+
+        Args:
+            rounds (int): The cost factor of the stored hash.
+            rehashed (bool): Whether the hash was replaced.
+        """
+        with self._lock:
+            costs = self._metrics.setdefault("cost", {})
+            costs[str(rounds)] = costs.get(str(rounds), 0) + 1
+        if rehashed:
+            self._record("rehash", None)
+
+    def metrics(self) -> Dict[str, Dict[str, float]]:
+        """Returns per-operation call count and timings in milliseconds,
+        and under "cost" the number of logins per stored cost factor.
+
+        Returns:
+            Dict[str, Dict[str, float]]: Metrics keyed by operation.
+        """
+        with self._lock:
+            return {name: dict(values)
+                    for name, values in self._metrics.items()}
+
+    def _run(self, name: str, func: Callable, *args):
+        """Runs func in the pool and records its timing."""
+        if self._wait > 0:
+            admitted = self._slots.acquire(timeout=self._wait)
+        else:
+            admitted = self._slots.acquire(blocking=False)
+        if not admitted:
+            self._record(name + "_rejected", None)
+            raise PoolSaturated(name)
+        start = time.perf_counter()
+        try:
+            future = self._executor.submit(func, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda f: self._slots.release())
+        result = future.result()
+        self._record(name, (time.perf_counter() - start) * 1000)
+        return result
+
+    def _record(self, name: str, elapsed_ms: float) -> None:
+        """Accumulates one call into the metrics."""
+        with self._lock:
+            values = self._metrics.setdefault(
+                name, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+            values["count"] += 1
+            if elapsed_ms is not None:
+                values["total_ms"] += elapsed_ms
+                values["max_ms"] = max(values["max_ms"], elapsed_ms)
+
+
+def calibrate_rounds(target_ms: float, min_rounds: int = MIN_ROUNDS,
+                     max_rounds: int = 16) -> int:
+    """Finds the highest cost factor hashing within target_ms here.
+
+    Each extra round doubles the work, so one hash is timed per cost
+    and the search stops once the next one would exceed the target.
+
+    Args:
+        target_ms (float): Time budget of one hash, in milliseconds.
+        min_rounds (int): Lowest cost factor returned.
+        max_rounds (int): Highest cost factor tried.
+
+    Returns:
+        int: The calibrated cost factor.
+    """
+    rounds = max(min_rounds, MIN_ROUNDS)
+    while rounds < min(max_rounds, MAX_ROUNDS):
+        salt = bcrypt.gensalt(rounds)
+        start = time.perf_counter()
+        bcrypt.hashpw(b"calibration", salt)
+        if (time.perf_counter() - start) * 2000 > target_ms:
+            break
+        rounds += 1
+    return rounds
+
+
+def hash_rounds(hashed_password: bytes) -> int:
+    """Reads the cost factor a bcrypt hash was made with.
+
+    Args:
+        hashed_password (bytes): A bcrypt hash, e.g. b"$2b$12$...".
+
+    Returns:
+        int: The cost factor.
+    """
+    if isinstance(hashed_password, str):
+        hashed_password = hashed_password.encode('utf-8')
+    return int(hashed_password.split(b"$")[2])
+
+
+_pool = None
+_pool_lock = threading.Lock()
+_rounds = None
+
+
+def get_pool() -> HashPool:
+    """Returns the process-wide HashPool, configured from the environment.
+
+    HASH_POOL_KIND (thread|process), HASH_POOL_WORKERS, HASH_POOL_QUEUE
+    and HASH_POOL_WAIT (seconds) tune the pool.
+
+    Returns:
+        HashPool: The shared pool.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            workers = os.getenv("HASH_POOL_WORKERS")
+            queue_size = os.getenv("HASH_POOL_QUEUE")
+            _pool = HashPool(
+                kind=os.getenv("HASH_POOL_KIND", "thread"),
+                workers=int(workers) if workers else None,
+                queue_size=int(queue_size) if queue_size else None,
+                wait=float(os.getenv("HASH_POOL_WAIT", 0)))
+        return _pool
+
+
+def get_rounds() -> int:
+    """Returns the cost factor for new hashes.
+
+    BCRYPT_ROUNDS fixes it; otherwise BCRYPT_TARGET_MS calibrates it
+    once per process; otherwise it is DEFAULT_ROUNDS. Calibration runs
+    outside the pool lock; threads racing on the first call may each
+    calibrate, the first result is kept.
+
+    Returns:
+        int: The cost factor.
+    """
+    global _rounds
+    if _rounds is None:
+        if os.getenv("BCRYPT_ROUNDS"):
+            rounds = int(os.getenv("BCRYPT_ROUNDS"))
+        elif os.getenv("BCRYPT_TARGET_MS"):
+            rounds = calibrate_rounds(float(os.getenv("BCRYPT_TARGET_MS")))
+        else:
+            rounds = DEFAULT_ROUNDS
+        with _pool_lock:
+            if _rounds is None:
+                _rounds = rounds
+    return _rounds